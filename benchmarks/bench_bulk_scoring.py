@@ -0,0 +1,66 @@
+"""
+Benchmark: vectorized bulk heuristic scoring vs. `_heuristic_fallback` clause by clause.
+
+Usage:
+    python -m benchmarks.bench_bulk_scoring [--sizes 10000 1000000] [--loop-max 100000]
+
+Results are checked for equality with the per-clause function on every run. The per-clause
+loop is timed on at most --loop-max clauses and its rate extrapolated for larger sizes.
+"""
+import sys
+import time
+import random
+import argparse
+
+from src.logic.risk_engine import _heuristic_fallback
+from src.logic.bulk_scoring import score_clauses, score_analyses
+
+FRAGMENTS = [
+    "The Vendor shall perform the services with due care and skill in accordance with good industry practice.",
+    "The Supplier shall indemnify the Client against all losses arising from any breach of this Agreement.",
+    "Either party may terminate this Agreement upon thirty (30) days written notice to the other party.",
+    "The Consultant shall not solicit any employee of the Company during the term and for one year after.",
+    "Any dispute shall be referred to arbitration and the courts at Mumbai shall have jurisdiction.",
+    "All invoices are payable within thirty days of receipt by electronic transfer.",
+    "This Agreement constitutes the entire agreement between the parties.",
+    "The courts at Mumbai shall have exclusive jurisdiction over any dispute arising from a breach hereof.",
+    "Each party shall bear the fees of its own solicitors and advisers.",
+]
+
+
+def _clauses(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(FRAGMENTS, k=rng.randint(1, 12))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 1000000])
+    parser.add_argument("--loop-max", type=int, default=100000, help="Largest per-clause loop actually run")
+    args = parser.parse_args()
+
+    check = _clauses(5000, seed=1)
+    if score_analyses(check) != [_heuristic_fallback(t) for t in check]:
+        print("MISMATCH: bulk scores differ from _heuristic_fallback")
+        return 1
+
+    print(f"{'clauses':>9} {'loop cl/s':>12} {'bulk cl/s':>12} {'speedup':>8}")
+    for n in args.sizes:
+        texts = _clauses(n)
+
+        sample = texts[:min(n, args.loop_max)]
+        t0 = time.perf_counter()
+        for t in sample:
+            _heuristic_fallback(t)
+        loop_rate = len(sample) / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        score_clauses(texts)
+        bulk_rate = n / (time.perf_counter() - t0)
+
+        note = "" if len(sample) == n else " (loop extrapolated)"
+        print(f"{n:>9} {loop_rate:>12,.0f} {bulk_rate:>12,.0f} {bulk_rate / loop_rate:>7.1f}x{note}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Report: held-out accuracy and latency of the local clause classifier.
+
+Usage:
+    python -m benchmarks.bench_classifier [--holdout 0.2] [--synthetic 20000]
+
+Trains on a split of the cached LLM analyses (current prompt version) and evaluates on the rest:
+exact and +/-1 risk-score accuracy, red-flag accuracy, and for each confidence threshold the share
+of clauses the classifier would answer locally and its accuracy on them. --synthetic labels
+generated clauses with the heuristic engine instead, to exercise the pipeline without a cache.
+"""
+import sys
+import time
+import random
+import argparse
+
+from src.logic.clause_classifier import train_classifier, load_training_samples
+
+THRESHOLDS = [0.5, 0.7, 0.8, 0.9, 0.95]
+
+
+def _synthetic(n, seed=0):
+    from src.logic.risk_engine import _heuristic_fallback
+    from benchmarks.bench_bulk_scoring import FRAGMENTS
+
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choices(FRAGMENTS, k=rng.randint(1, 4))) for _ in range(n)]
+    return [(t, "en", _heuristic_fallback(t)) for t in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N heuristic-labelled synthetic clauses")
+    parser.add_argument("--epochs", type=int, default=15)
+    args = parser.parse_args()
+
+    samples = _synthetic(args.synthetic) if args.synthetic else load_training_samples()
+    if len(samples) < 20:
+        print(f"Only {len(samples)} labelled clauses available; analyse more contracts or pass --synthetic N.")
+        return 1
+
+    random.Random(1).shuffle(samples)
+    cut = int(len(samples) * (1 - args.holdout))
+    train, test = samples[:cut], samples[cut:]
+
+    t0 = time.perf_counter()
+    model = train_classifier(train, epochs=args.epochs)
+    print(f"trained on {len(train)} clauses in {time.perf_counter() - t0:.1f}s, evaluating {len(test)}")
+
+    rows = []
+    latencies = []
+    for text, lang, analysis in test:
+        t0 = time.perf_counter()
+        predicted, confidence = model.predict(text, lang)
+        latencies.append(time.perf_counter() - t0)
+        if predicted is None:
+            rows.append((0.0, False, False, False))
+            continue
+        truth = int(analysis["risk_score"])
+        rows.append((confidence, predicted["risk_score"] == truth,
+                     abs(predicted["risk_score"] - truth) <= 1, predicted["red_flag"] == bool(analysis["red_flag"])))
+
+    n = len(rows)
+    print(f"exact score {sum(r[1] for r in rows) / n:.1%} • within 1 {sum(r[2] for r in rows) / n:.1%} • red flag {sum(r[3] for r in rows) / n:.1%}")
+    latencies.sort()
+    print(f"latency p50 {latencies[n // 2] * 1e6:.0f} µs • p95 {latencies[int(n * 0.95)] * 1e6:.0f} µs")
+
+    print(f"{'min conf':>9} {'answered':>9} {'within 1':>9} {'red flag':>9}")
+    for threshold in THRESHOLDS:
+        local = [r for r in rows if r[0] >= threshold]
+        if not local:
+            print(f"{threshold:>9.2f} {0:>8.0%} {'-':>9} {'-':>9}")
+            continue
+        print(f"{threshold:>9.2f} {len(local) / n:>8.0%} {sum(r[2] for r in local) / len(local):>8.1%} {sum(r[3] for r in local) / len(local):>8.1%}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
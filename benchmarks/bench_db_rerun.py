@@ -0,0 +1,74 @@
+"""
+Benchmark: MongoDB cost of one Streamlit rerun, per-call clients vs. the shared pooled client.
+
+Usage:
+    MONGO_URI=mongodb+srv://... python -m benchmarks.bench_db_rerun [--reruns 20]
+
+A rerun is what the app does against the database on every click: the sidebar status check
+followed by the recent-history query.
+"""
+import sys
+import time
+import argparse
+
+import certifi
+import pymongo
+
+from src.utils import db_handler
+
+
+def legacy_get_db_connection():
+    """The previous implementation: new client, TLS handshake and ping on every call."""
+    if not db_handler.MONGO_URI or "localhost" in db_handler.MONGO_URI:
+        return None
+    try:
+        client = pymongo.MongoClient(db_handler.MONGO_URI, serverSelectionTimeoutMS=10000, tls=True, tlsCAFile=certifi.where())
+        client.admin.command('ping')
+        return client[db_handler.DB_NAME][db_handler.COLLECTION_NAME]
+    except Exception as e:
+        print(f"MongoDB Connection Error: {e}")
+        return None
+
+
+def legacy_rerun():
+    legacy_get_db_connection()
+    collection = legacy_get_db_connection()
+    if collection is not None:
+        list(collection.find({}, {"filename": 1, "upload_date": 1, "risk_overall_score": 1}).sort("upload_date", -1).limit(3))
+
+
+def pooled_rerun():
+    db_handler.get_db_connection()
+    db_handler.get_recent_contracts(limit=3)
+
+
+def _measure(fn, reruns):
+    timings = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    if db_handler.get_db_client() is None:
+        print("Set MONGO_URI to a reachable (non-localhost) MongoDB deployment.")
+        return 1
+    if not db_handler.get_db_status()["healthy"]:
+        print(f"MongoDB unreachable: {db_handler.get_db_status()['error']}")
+        return 1
+
+    print(f"{'client':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, fn in (("per-call", legacy_rerun), ("pooled", pooled_rerun)):
+        p50, p95 = _measure(fn, args.reruns)
+        print(f"{name:>8} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
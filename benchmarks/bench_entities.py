@@ -0,0 +1,110 @@
+"""
+Benchmark: single-pass `extract_entities` vs. the previous four-pass implementation.
+Before timing, checks on a seeded corpus that the per-type passes `scan_entities` merges
+find exactly what the combined alternation finds, and exits non-zero if they don't.
+
+Usage:
+    python -m benchmarks.bench_entities [--sizes 1 5 10 50] [--samples 5000]
+"""
+import re
+import sys
+import time
+import random
+import argparse
+
+from src.logic import nlp_processor
+from src.logic.nlp_processor import extract_entities, scan_entities
+
+
+def legacy_extract_entities(text):
+    """The pre-scanner implementation: four uncompiled passes, positions discarded."""
+    entities = {"PARTIES": [], "DATES": [], "MONEY": [], "GPE": []}
+    money_pattern = r'(\$|Rs\.|INR|USD)\s?\d+(?:,\d+)*(?:\.\d+)?'
+    entities["MONEY"] = list(set(re.findall(money_pattern, text)))
+    date_pattern = r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4})|(?:\d{1,2} (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{4})\b'
+    entities["DATES"] = list(set(re.findall(date_pattern, text)))
+    party_pattern = r'\b[A-Z][a-z]+ (?:Co\.|Ltd\.|Inc\.|LLP|Corp\.|Private Limited|Limited)\b'
+    entities["PARTIES"] = list(set(re.findall(party_pattern, text)))
+    if not entities["PARTIES"]:
+        between_match = re.search(r'between\s+([^,and]+)(?:\s+and\s+|\s*,\s*)([^,.]+)', text, re.IGNORECASE)
+        if between_match:
+            entities["PARTIES"] = [between_match.group(1).strip(), between_match.group(2).strip()]
+    return entities
+
+
+SAMPLE = (
+    "This Services Agreement is made on 12/05/2023 between Acme Private Limited and Globex Limited, "
+    "having its office at Mumbai, India. The Client shall pay Rs. 1,50,000 per month and a one-time fee of "
+    "$2,500.00 no later than 15 March 2024. The Vendor shall indemnify the Client against all claims, "
+    "and either party may terminate this Agreement upon thirty (30) days written notice.\n"
+)
+# Typical contract prose: long runs of wording with no entities in them
+PROSE = (
+    "The Vendor shall perform the services with due care and skill, in accordance with good industry practice, "
+    "and shall comply with all applicable laws, regulations and policies notified by the Client from time to time. "
+) * 8
+
+
+# Fragments that make matches touch, overlap, nest and start mid-word when glued together at random
+FRAGMENTS = [
+    "Acme", "Co.", "Ltd.", "Private Limited", "between", "Between", "and", ",", ";", ".", "\n", "x", "_", "7",
+    "12/05/2023", "1-2-99", "31/12/24", "3 Jan 2024", "15 March 2024", "$5", "$2,500.00", "Rs.", "INR 1,000", "USD",
+    "Delhi", "New Delhi", "Mumbai", "India", "Tamil Nadu", "१२/०५/२०२३", "Limited", "Inc.", "LLP",
+]
+
+
+def corpus(samples, seed=1):
+    """The benchmark texts plus `samples` random fragment strings."""
+    rng = random.Random(seed)
+    texts = [SAMPLE, PROSE + SAMPLE, ""]
+    for _ in range(samples):
+        count = rng.randint(1, 30)
+        texts.append("".join(rng.choice(FRAGMENTS) + rng.choice(["", " ", " ", "  "]) for _ in range(count)))
+    return texts
+
+
+def check_equivalence(texts):
+    """Texts on which the merged passes and the combined alternation disagree."""
+    def spans(matches):
+        return [(start, end, kind, m.group()) for start, end, kind, m in matches]
+
+    return [t for t in texts if spans(nlp_processor._entity_matches(t)) != spans(nlp_processor._scan_combined(t))]
+
+
+def _time(fn, text, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 5, 10, 50], help="Input sizes in MB")
+    parser.add_argument("--samples", type=int, default=5000, help="Random texts in the equivalence check")
+    args = parser.parse_args()
+
+    texts = corpus(args.samples)
+    mismatches = check_equivalence(texts)
+    print(f"equivalence: {len(texts) - len(mismatches)}/{len(texts)} texts scan the same as the combined pattern")
+    for text in mismatches[:5]:
+        print(f"  MISMATCH {text!r}")
+    if mismatches:
+        return 1
+
+    print(f"{'mix':>6} {'MB':>4} {'legacy s':>10} {'extract s':>10} {'scan s':>10} {'alt s':>10} {'speedup':>8} {'matches':>9}")
+    for mix, unit in (("dense", SAMPLE), ("prose", PROSE + SAMPLE)):
+        for mb in args.sizes:
+            text = unit * (mb * 1024 * 1024 // len(unit))
+            legacy = _time(legacy_extract_entities, text)
+            new = _time(extract_entities, text)
+            scan = _time(scan_entities, text)
+            alt = _time(nlp_processor._scan_combined, text)
+            count = len(scan_entities(text))
+            print(f"{mix:>6} {mb:>4} {legacy:>10.3f} {new:>10.3f} {scan:>10.3f} {alt:>10.3f} {legacy / new:>7.2f}x {count:>9}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
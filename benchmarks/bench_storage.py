@@ -0,0 +1,247 @@
+"""
+Conformance checks and throughput for the contract storage backends.
+
+Usage:
+    python -m benchmarks.bench_storage [--backend sqlite|mongo] [--documents 2000]
+
+Runs the same checks against any ContractRepository: save/replace semantics of the analysis
+identity, history paging and filters, lookup by hash and analytics, then times saves, history
+pages (first, deep and filtered), hash lookups and analytics over --documents synthetic
+contracts. The SQLite backend runs on a temporary file with no network; --backend mongo uses a
+scratch collection on MONGO_URI that is dropped afterwards.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+
+from src.utils.repository import SCORE_BANDS, normalise_party
+
+PARTIES = [f"{name} {suffix}" for name in ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne",
+                                           "Tyrell", "Cyberdyne", "Soylent") for suffix in ("Pvt Ltd", "LLP", "Inc")]
+SCRATCH_COLLECTION = "contracts_storage_bench"
+
+
+def _contract(rng, i):
+    clauses = [{"clause": f"Clause {n} of contract {i}.", "risk_score": rng.randint(1, 10), "red_flag": rng.random() < 0.2,
+                "explanation": "Synthetic clause.", "suggestion": "None."} for n in range(rng.randint(3, 12))]
+    return {
+        "filename": f"contract_{i}.pdf",
+        "text": "",
+        "entities": {"PARTIES": rng.sample(PARTIES, rng.randint(0, 3)), "DATES": [], "MONEY": [], "GPE": []},
+        "risk_analysis": clauses,
+        "overall_assessment": {"overall_score": rng.randint(5, 100), "summary": f"Summary of contract {i}."},
+        "content_hash": f"{i:064x}",
+        "language": rng.choice(["en", "en", "en", "hi"]),
+        "prompt_version": "1",
+    }
+
+
+def _save(repo, contract):
+    return repo.save(**contract)
+
+
+# --- conformance ---
+
+def check_conformance(repo):
+    """Runs the behavioural checks on an empty repository. Returns [(check, passed, detail)]."""
+    results = []
+
+    def check(name, passed, detail=""):
+        results.append((name, bool(passed), detail))
+
+    rng = random.Random(7)
+    contracts = [_contract(rng, i) for i in range(12)]
+    ids = []
+    for n, contract in enumerate(contracts):
+        ids.append(_save(repo, contract))
+        if n == 5:
+            time.sleep(0.02)
+            midpoint = datetime.now()
+            time.sleep(0.02)
+    repo.flush(30)
+    check("save returns string ids", all(isinstance(i, str) and i for i in ids), ids[:2])
+    check("ids are unique", len(set(ids)) == len(ids))
+
+    c = contracts[3]
+    found = repo.find_by_hash(c["content_hash"], "1", c["language"])
+    check("find_by_hash returns the saved analysis",
+          found is not None and str(found["_id"]) == ids[3] and found["full_analysis"] == c["risk_analysis"]
+          and found["entities"] == c["entities"] and found["risk_overall_score"] == c["overall_assessment"]["overall_score"]
+          and found["risk_summary"] == c["overall_assessment"]["summary"] and isinstance(found["upload_date"], datetime),
+          found and {k: found.get(k) for k in ("_id", "risk_overall_score")})
+    check("find_by_hash without language", (repo.find_by_hash(c["content_hash"], "1") or {}).get("_id") is not None)
+    check("find_by_hash misses on another prompt version", repo.find_by_hash(c["content_hash"], "0", c["language"]) is None)
+    check("find_by_hash misses on another language",
+          repo.find_by_hash(c["content_hash"], "1", "hi" if c["language"] == "en" else "en") is None)
+
+    # Same identity again: replaced in place, id kept
+    replaced = dict(c, overall_assessment={"overall_score": 42, "summary": "Re-analysed."})
+    again = _save(repo, replaced)
+    repo.flush(30)
+    found = repo.find_by_hash(c["content_hash"], "1", c["language"])
+    check("re-saving an identity keeps one document", found is not None and str(found["_id"]) == ids[3]
+          and found["risk_overall_score"] == 42, (again, found and found["_id"]))
+    check("re-saving an identity returns the stored id", again == ids[3], (again, ids[3]))
+    contracts[3] = replaced
+
+    # Without a content hash: a plain insert, no identity fields
+    loose = dict(_contract(rng, 99), content_hash=None, language=None, prompt_version=None)
+    ids.append(_save(repo, loose))
+    contracts.append(loose)
+    repo.flush(30)
+
+    everything, cursor, pages = [], None, 0
+    while True:
+        page, cursor = repo.history(limit=4, cursor=cursor)
+        everything += page
+        pages += 1
+        if cursor is None or pages > 50:
+            break
+    keys = [(d["upload_date"], str(d["_id"])) for d in everything]
+    check("history pages cover every document once", sorted(str(d["_id"]) for d in everything) == sorted(set(ids)),
+          f"{len(everything)} documents in {pages} pages")
+    check("history is newest first", all(a[0] >= b[0] for a, b in zip(keys, keys[1:])))
+    check("history carries summary fields", all({"filename", "upload_date", "risk_overall_score"} <= set(d) for d in everything)
+          and all("full_analysis" not in d for d in everything))
+    check("recent matches the first history page",
+          [str(d["_id"]) for d in repo.recent(limit=3)] == [str(d["_id"]) for d in everything[:3]])
+    check("loose save has no identity fields", next(d for d in everything if str(d["_id"]) == ids[-1]).get("content_hash") is None)
+    check("bad cursor returns an empty page", repo.history(limit=4, cursor="not-a-cursor") == ([], None))
+
+    def filtered(**filters):
+        out, cursor = [], None
+        while True:
+            page, cursor = repo.history(limit=3, cursor=cursor, **filters)
+            out += page
+            if cursor is None:
+                return sorted(str(d["_id"]) for d in out)
+
+    by_id = dict(zip(ids, contracts))
+    score = lambda c: c["overall_assessment"]["overall_score"]
+    expected = sorted(i for i, c in by_id.items() if 30 <= score(c) <= 70)
+    check("score range filter", filtered(min_score=30, max_score=70) == expected, len(expected))
+    party = PARTIES[4]
+    expected = sorted(i for i, c in by_id.items() if party in c["entities"]["PARTIES"])
+    check("party filter is case-insensitive", filtered(party=f"  {party.upper()} ") == expected, len(expected))
+    # The replaced document moved past the midpoint when it was saved again
+    later = sorted(i for n, i in enumerate(ids) if n > 5 or n == 3)
+    check("date range filter", filtered(start_date=midpoint) == later and
+          filtered(end_date=midpoint) == sorted(set(ids) - set(later)), len(later))
+
+    stats = repo.analytics()
+    scores = [score(c) for c in by_id.values()]
+    check("analytics totals", stats["contracts"] == len(by_id) and stats["min_score"] == min(scores)
+          and stats["max_score"] == max(scores) and abs(stats["avg_score"] - sum(scores) / len(scores)) < 1e-6
+          and stats["clauses_analyzed"] == sum(len(c["risk_analysis"]) for c in by_id.values()),
+          {k: stats[k] for k in ("contracts", "avg_score", "clauses_analyzed")})
+    check("analytics score bands", stats["score_bands"] == {
+        name: sum(lo <= s < hi for s in scores) for name, lo, hi in SCORE_BANDS}, stats["score_bands"])
+    languages = {}
+    for c in by_id.values():
+        languages[c["language"] or "unknown"] = languages.get(c["language"] or "unknown", 0) + 1
+    check("analytics languages", stats["languages"] == languages, stats["languages"])
+    counts = {}
+    for c in by_id.values():
+        for p in {normalise_party(p) for p in c["entities"]["PARTIES"]}:
+            counts[p] = counts.get(p, 0) + 1
+    top = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    check("analytics top parties", stats["top_parties"] == top[:10] and repo.analytics(top_parties=3)["top_parties"] == top[:3],
+          stats["top_parties"][:3])
+    check("analytics date range", repo.analytics(start_date=midpoint)["contracts"] == len(later))
+    return results
+
+
+# --- throughput ---
+
+def _timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def measure_throughput(repo, documents, seed=0):
+    rng = random.Random(seed)
+    contracts = [_contract(rng, 1000 + i) for i in range(documents)]
+
+    t0 = time.perf_counter()
+    for contract in contracts:
+        _save(repo, contract)
+    repo.flush(600)
+    save_seconds = time.perf_counter() - t0
+
+    def walk(limit=20):
+        cursor, pages = None, 0
+        while True:
+            _, cursor = repo.history(limit=limit, cursor=cursor)
+            pages += 1
+            if cursor is None:
+                return pages
+
+    t0 = time.perf_counter()
+    pages = walk()
+    walk_seconds = time.perf_counter() - t0
+
+    probes = rng.sample(contracts, min(200, len(contracts)))
+    t0 = time.perf_counter()
+    for c in probes:
+        repo.find_by_hash(c["content_hash"], c["prompt_version"], c["language"])
+    lookup_seconds = (time.perf_counter() - t0) / len(probes)
+
+    print(f"{'operation':<28} {'result':>14}")
+    print(f"{'save':<28} {documents / save_seconds:>10.0f} /s")
+    print(f"{'history, first page':<28} {_timed(lambda: repo.history(limit=20), 20) * 1000:>11.2f} ms")
+    print(f"{'history, every page':<28} {walk_seconds / pages * 1000:>11.2f} ms  ({pages} pages)")
+    print(f"{'history, party filter':<28} {_timed(lambda: repo.history(limit=20, party=PARTIES[0]), 20) * 1000:>11.2f} ms")
+    print(f"{'history, score range':<28} {_timed(lambda: repo.history(limit=20, min_score=40, max_score=60), 20) * 1000:>11.2f} ms")
+    print(f"{'find_by_hash':<28} {lookup_seconds * 1000:>11.2f} ms")
+    print(f"{'analytics':<28} {_timed(repo.analytics, 5) * 1000:>11.2f} ms")
+
+
+def _open(backend, directory):
+    if backend == "sqlite":
+        from src.utils.sqlite_repository import SQLiteContractRepository
+        return SQLiteContractRepository(os.path.join(directory, "contracts.sqlite3")), lambda: None
+
+    from src.utils import db_handler
+    from src.utils.repository import MongoContractRepository
+    if db_handler.get_db_connection(SCRATCH_COLLECTION) is None:
+        return None, None
+    db_handler.get_db_connection(SCRATCH_COLLECTION).drop()
+    return MongoContractRepository(SCRATCH_COLLECTION), lambda: db_handler.get_db_connection(SCRATCH_COLLECTION).drop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["sqlite", "mongo"], default="sqlite")
+    parser.add_argument("--documents", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo, cleanup = _open(args.backend, directory)
+        if repo is None:
+            print("Set MONGO_URI to a reachable (non-localhost) MongoDB deployment.")
+            return 1
+        try:
+            results = check_conformance(repo)
+            for name, passed, detail in results:
+                print(f"{'✅' if passed else '❌'} {name}" + ("" if passed or detail == "" else f"  ({detail})"))
+            failed = sum(not passed for _, passed, _ in results)
+            print(f"{len(results) - failed}/{len(results)} checks passed\n")
+
+            measure_throughput(repo, args.documents)
+        finally:
+            repo.close()
+            cleanup()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
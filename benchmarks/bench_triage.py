@@ -0,0 +1,121 @@
+"""
+Report: LLM requests, tokens and latency saved by the heuristic triage tier per threshold setting.
+
+Usage:
+    python -m benchmarks.bench_triage [contract.pdf|.docx|.txt] [--from-cache] [--seconds-per-request 4]
+
+Clauses come from the given document, from the clause analysis cache, or from a synthetic contract.
+With --from-cache each band is also checked against the cached LLM verdicts: 'hi ok' is the share
+of high-band clauses the LLM red-flagged, 'lo ok' the share of low-band clauses it scored at most
+LOW_BAND_MAX_SCORE without a red flag.
+Latency is estimated as batched requests / LLM_MAX_CONCURRENCY * --seconds-per-request.
+"""
+import os
+import sys
+import math
+import argparse
+from io import BytesIO
+
+from src.logic.nlp_processor import split_into_clauses, iter_clauses
+from src.logic.risk_engine import estimate_clause_risk, estimate_clause_tokens, pack_batches
+from src.logic.llm_client import LLM_MAX_CONCURRENCY
+
+SYNTHETIC_CLAUSES = [
+    "1. Definitions. In this Agreement the following words shall have the meanings given to them below unless the context requires otherwise.",
+    "2. Services. The Vendor shall perform the services described in Schedule A with due care and skill, in accordance with good industry practice.",
+    "3. Payment. The Client shall pay all undisputed invoices within thirty (30) days of receipt by bank transfer to the account notified by the Vendor.",
+    "4. Indemnity. The Vendor shall indemnify and hold harmless the Client against all losses, and the limit of liability shall not apply to any breach of confidentiality.",
+    "5. Termination. Either party may terminate this Agreement upon thirty (30) days written notice to the other party.",
+    "6. Exclusivity. The Client shall not solicit or engage any competing vendor and agrees to a non-compete period of five years across India.",
+    "7. Liability. Neither party shall be liable for indirect losses arising from any breach of this Agreement.",
+    "8. Governing Law. Any dispute arising out of this Agreement shall be subject to the exclusive jurisdiction of the courts at Mumbai.",
+    "9. Notices. All notices shall be in writing and delivered by hand, courier or email to the addresses set out above.",
+    "10. Entire Agreement. This Agreement constitutes the entire agreement between the parties and supersedes all prior understandings.",
+]
+
+THRESHOLDS = [(0.0, 1.0), (0.0, 0.9), (0.0, 0.85), (0.1, 0.85), (0.2, 0.85), (0.3, 0.8)]
+# Highest cached LLM risk score (1-10) that counts as agreeing with a low-band verdict
+LOW_BAND_MAX_SCORE = 3
+
+
+def _load_document(path):
+    from src.utils.file_handler import iter_text_from_file
+
+    with open(path, "rb") as f:
+        data = BytesIO(f.read())
+    data.name = os.path.basename(path)
+    return [clause.text for clause in iter_clauses(iter_text_from_file(data))]
+
+
+def _load_cache():
+    from src.logic.analysis_cache import get_analysis_cache
+
+    cache = get_analysis_cache()
+    if not cache:
+        return [], []
+    texts, labels = [], []
+    for text, lang, _, analysis in cache.entries():
+        if lang == "en":
+            texts.append(text)
+            try:
+                score = int(analysis.get("risk_score"))
+            except (TypeError, ValueError):
+                score = None
+            labels.append((bool(analysis.get("red_flag")), score))
+    return texts, labels
+
+
+def _cost(texts):
+    requests = len(pack_batches(texts)) if texts else 0
+    tokens = sum(estimate_clause_tokens(t) for t in texts)
+    return requests, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("document", nargs="?")
+    parser.add_argument("--from-cache", action="store_true", help="Use cached LLM analyses as clauses and labels")
+    parser.add_argument("--seconds-per-request", type=float, default=4.0)
+    parser.add_argument("--repeat", type=int, default=50, help="Copies of the synthetic contract")
+    args = parser.parse_args()
+
+    labels = None
+    if args.from_cache:
+        texts, labels = _load_cache()
+    elif args.document:
+        texts = _load_document(args.document)
+    else:
+        texts = split_into_clauses("\n".join(SYNTHETIC_CLAUSES) + "\n") * args.repeat
+    if not texts:
+        print("No clauses to triage.")
+        return 1
+
+    all_requests, all_tokens = _cost(texts)
+    risks = [estimate_clause_risk(t) for t in texts]
+    print(f"{len(texts)} clauses • untriaged: {all_requests} requests, {all_tokens} tokens")
+    print(f"{'low':>5} {'high':>5} {'local lo':>9} {'local hi':>9} {'to LLM':>7} {'requests':>9} {'tokens':>9} {'saved':>7} {'est. s':>7} {'lo ok':>6} {'hi ok':>6}")
+
+    for low, high in THRESHOLDS:
+        local_low = [i for i, r in enumerate(risks) if r <= low]
+        local_high = [i for i, r in enumerate(risks) if r >= high]
+        local = set(local_low) | set(local_high)
+        escalated = [t for i, t in enumerate(texts) if i not in local]
+
+        requests, tokens = _cost(escalated)
+        seconds = math.ceil(requests / LLM_MAX_CONCURRENCY) * args.seconds_per_request
+        saved = 1 - tokens / all_tokens if all_tokens else 0.0
+
+        low_ok = high_ok = ""
+        if labels is not None:
+            # High band stands for a red flag; low band for a clause the LLM also rates low risk
+            if local_low:
+                ok = sum(1 for i in local_low if not labels[i][0] and labels[i][1] is not None and labels[i][1] <= LOW_BAND_MAX_SCORE)
+                low_ok = f"{ok / len(local_low):.0%}"
+            if local_high:
+                high_ok = f"{sum(1 for i in local_high if labels[i][0]) / len(local_high):.0%}"
+        print(f"{low:>5.2f} {high:>5.2f} {len(local_low):>9} {len(local_high):>9} {len(escalated):>7} "
+              f"{requests:>9} {tokens:>9} {saved:>6.0%} {seconds:>7.0f} {low_ok:>6} {high_ok:>6}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(".cache", "clause_analysis.sqlite3"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_DAYS", "30")) * 86400
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+
+_LEADING_MARKER = re.compile(r'^\s*(?:\d+(?:\.\d+)*[.)]?|\(\w{1,4}\))\s+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalise_clause(text):
+    """Case, whitespace and leading clause number don't change the analysis."""
+    return _WHITESPACE.sub(" ", _LEADING_MARKER.sub("", text)).strip().lower()
+
+
+def cache_key(text, lang, model, prompt_version):
+    raw = "\x1f".join((normalise_clause(text), lang, model, str(prompt_version)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ClauseAnalysisCache:
+    """
+    Persistent SQLite cache of clause analyses.
+    Entries expire after `ttl` seconds and the least recently used are evicted
+    once the table grows past `max_entries`. The normalised clause text is kept
+    alongside each result so cached analyses can double as training data.
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_PATH, ttl=ANALYSIS_CACHE_TTL_SECONDS, max_entries=ANALYSIS_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS clause_analysis (
+                key TEXT PRIMARY KEY,
+                clause_text TEXT NOT NULL,
+                language TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_clause_analysis_access ON clause_analysis(last_access)")
+        self._conn.commit()
+
+    def get(self, text, lang, model, prompt_version):
+        """Returns the cached analysis dict, or None on a miss or expired entry."""
+        key = cache_key(text, lang, model, prompt_version)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT analysis, created FROM clause_analysis WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM clause_analysis WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE clause_analysis SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, text, lang, model, prompt_version, analysis):
+        key = cache_key(text, lang, model, prompt_version)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO clause_analysis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, normalise_clause(text), lang, model, str(prompt_version), json.dumps(analysis, ensure_ascii=False), now, now)
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM clause_analysis WHERE created < ?", (time.time() - self.ttl,))
+        self._conn.execute("""
+            DELETE FROM clause_analysis WHERE key IN (
+                SELECT key FROM clause_analysis ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def entries(self, prompt_version=None):
+        """Yields (clause_text, language, model, analysis) rows, e.g. for offline training."""
+        query = "SELECT clause_text, language, model, analysis FROM clause_analysis"
+        params = ()
+        if prompt_version is not None:
+            query += " WHERE prompt_version = ?"
+            params = (str(prompt_version),)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for text, lang, model, analysis in rows:
+            yield text, lang, model, json.loads(analysis)
+
+    def stats(self):
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM clause_analysis").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Returns the process-wide clause analysis cache (None if it cannot be opened)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ClauseAnalysisCache()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Clause cache unavailable: {e}")
+                _cache = False
+        return _cache or None
@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import numpy as np
+
+from src.logic.keyword_matcher import get_keyword_automaton, fold_case, keyword_pattern, MASK_CATEGORY
+from src.logic.risk_engine import HEURISTIC_RESPONSES
+
+# Joins clauses into one corpus; no keyword contains it, so matches never span two clauses
+_SEPARATOR = "\x00"
+
+BulkScores = namedtuple("BulkScores", ["risk_score", "category", "red_flag", "length", "categories"])
+
+
+def keyword_matrix(clause_texts, rules=None):
+    """
+    Keyword presence for many clauses at once.
+    The clauses are case-folded into a single corpus and each keyword is located with one
+    regex scan of it (`keyword_pattern`, so word boundaries and inflections match the automaton);
+    hits inside 'mask' phrases are dropped and offsets are mapped back to clauses with a binary search.
+    Returns:
+        (np.ndarray, list): bool matrix [clause, rule] and the rules (KeywordRule) of its columns.
+    """
+    rules = list(rules if rules is not None else get_keyword_automaton().rules)
+    lowered = [fold_case(t) for t in clause_texts]
+    lengths = np.fromiter((len(t) + 1 for t in lowered), dtype=np.int64, count=len(lowered))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lowered) else np.zeros(0, dtype=np.int64)
+    corpus = _SEPARATOR.join(lowered)
+
+    # The same keyword can appear under several categories; scan it once.
+    # Spans end with the keyword itself, not its inflection, as in the automaton
+    spans = {}
+    for rule in rules:
+        if rule.keyword not in spans:
+            offsets = np.fromiter((m.start() for m in keyword_pattern(rule.keyword).finditer(corpus)), dtype=np.int64)
+            spans[rule.keyword] = (offsets, offsets + len(rule.keyword))
+
+    # Mask phrases sorted by start, with the furthest end reached so far: a hit is masked
+    # when some phrase starting at or before it reaches its end
+    mask_starts = np.concatenate([spans[r.keyword][0] for r in rules if r.category == MASK_CATEGORY] + [np.zeros(0, dtype=np.int64)])
+    mask_ends = np.concatenate([spans[r.keyword][1] for r in rules if r.category == MASK_CATEGORY] + [np.zeros(0, dtype=np.int64)])
+    order = np.argsort(mask_starts, kind="stable")
+    mask_starts, reach = mask_starts[order], np.maximum.accumulate(mask_ends[order]) if len(order) else mask_ends
+
+    present = np.zeros((len(lowered), len(rules)), dtype=bool)
+    for col, rule in enumerate(rules):
+        if rule.category == MASK_CATEGORY:
+            continue
+        offsets, ends = spans[rule.keyword]
+        if len(mask_starts):
+            last = np.searchsorted(mask_starts, offsets, side="right") - 1
+            offsets = offsets[~((last >= 0) & (reach[np.maximum(last, 0)] >= ends))]
+        present[np.searchsorted(starts, offsets, side="right") - 1, col] = True
+    return present, rules
+
+
+def score_clauses(clause_texts, rules=None):
+    """
+    Vectorized `_heuristic_fallback` for bulk (re-)scoring: keyword features, the
+    length-based complexity score and the final scores are computed as arrays.
+    Returns:
+        BulkScores: 'risk_score' (int), 'red_flag' (bool) and 'length' (int) arrays, plus
+        'category', the index into 'categories' of the deciding keyword category (-1 for none).
+    """
+    clause_texts = list(clause_texts)
+    present, rules = keyword_matrix(clause_texts, rules)
+    lengths = np.fromiter((len(t) for t in clause_texts), dtype=np.int64, count=len(clause_texts))
+
+    categories = list(HEURISTIC_RESPONSES)
+    risk = np.minimum(4, lengths // 200) + 1
+    category = np.full(len(clause_texts), -1, dtype=np.int64)
+    red_flag = np.zeros(len(clause_texts), dtype=bool)
+    undecided = np.ones(len(clause_texts), dtype=bool)
+
+    # First category hit wins, with its highest matched rule weight as the score
+    for c, name in enumerate(categories):
+        cols = [i for i, rule in enumerate(rules) if rule.category == name]
+        if not cols:
+            continue
+        weights = np.array([rules[i].weight for i in cols], dtype=np.float64)
+        hit = present[:, cols]
+        wins = undecided & hit.any(axis=1)
+        best = np.where(hit[wins], weights, -np.inf).max(axis=1)
+        risk[wins] = best.astype(np.int64)
+        category[wins] = c
+        red_flag[wins] = HEURISTIC_RESPONSES[name]["red_flag"]
+        undecided &= ~wins
+
+    return BulkScores(risk, category, red_flag, lengths, categories)
+
+
+def score_analyses(clause_texts, rules=None):
+    """Per-clause analysis dicts from `score_clauses`, identical to `_heuristic_fallback`'s."""
+    clause_texts = list(clause_texts)
+    scores = score_clauses(clause_texts, rules)
+    analyses = []
+    for risk, c, length in zip(scores.risk_score.tolist(), scores.category.tolist(), scores.length.tolist()):
+        if c >= 0:
+            analyses.append({"risk_score": risk, **HEURISTIC_RESPONSES[scores.categories[c]], "source": "heuristic"})
+        else:
+            analyses.append({
+                "risk_score": risk,
+                "explanation": f"Standard clause of {length} chars. Base heuristic check passed.",
+                "red_flag": False,
+                "suggestion": "Standard legal wording. Ensure alignment with business goals.",
+                "source": "heuristic",
+            })
+    return analyses
@@ -0,0 +1,244 @@
+import os
+import re
+import json
+import math
+import zlib
+import random
+import argparse
+import threading
+
+import numpy as np
+
+from src.logic.analysis_cache import normalise_clause
+from src.logic.keyword_matcher import get_keyword_automaton
+
+CLASSIFIER_PATH = os.getenv("CLASSIFIER_PATH", os.path.join(".cache", "clause_classifier.npz"))
+# Predictions below this confidence are escalated to the LLM
+CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_MIN_CONFIDENCE", "0.9"))
+
+N_FEATURES = 2 ** 18
+RISK_CLASSES = np.arange(1, 11)
+
+_TOKEN = re.compile(r"\w+")
+
+# Clause risk score bands for the templated explanation: (lowest score, name)
+_SCORE_BANDS = ((7, "high"), (4, "moderate"), (1, "low"))
+
+
+def hash_features(text):
+    """
+    Hashed unigram + bigram features of a clause (log-scaled counts, L2-normalised).
+    crc32 keeps the hashing stable across processes, unlike the builtin hash().
+    Returns:
+        (np.ndarray, np.ndarray): feature indices and values.
+    """
+    tokens = _TOKEN.findall(normalise_clause(text))
+    counts = {}
+    for gram in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+        h = zlib.crc32(gram.encode("utf-8")) & (N_FEATURES - 1)
+        counts[h] = counts.get(h, 0) + 1
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    return indices, values / np.sqrt(np.dot(values, values))
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _sample_target(analysis):
+    """(risk score 1-10, red flag) of a cached analysis, or None if it is malformed."""
+    try:
+        score = int(analysis["risk_score"])
+        return min(10, max(1, score)), bool(analysis["red_flag"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class ClauseClassifier:
+    """
+    Linear model distilled from cached LLM clause analyses: a softmax over risk scores 1-10
+    and a logistic red-flag head on shared hashed text features. Predictions carry a templated
+    explanation that says they are an estimate, never another clause's reasoning.
+    """
+
+    def __init__(self, weights, bias, flag_weights, flag_bias, meta=None):
+        self.weights = weights            # [N_FEATURES, 10]
+        self.bias = bias                  # [10]
+        self.flag_weights = flag_weights  # [N_FEATURES]
+        self.flag_bias = flag_bias
+        self.meta = meta or {}
+
+    def predict_proba(self, text):
+        """Returns (probabilities over risk scores 1-10, red-flag probability)."""
+        indices, values = hash_features(text)
+        probs = _softmax(values @ self.weights[indices] + self.bias)
+        flag = _sigmoid(float(values @ self.flag_weights[indices]) + self.flag_bias)
+        return probs, flag
+
+    def predict(self, text, lang="en"):
+        """
+        Returns:
+            (dict, float): analysis in the `analyze_risk_with_llm` shape (None for languages
+            other than English, whose explanation the template can't write) and its confidence in
+            [0, 1]. The confidence is the probability mass within one point of the predicted
+            score, capped by the red-flag head's certainty.
+        """
+        if lang != "en":
+            return None, 0.0
+        probs, flag = self.predict_proba(text)
+        best = int(np.argmax(probs))
+        confidence = min(float(probs[max(0, best - 1):best + 2].sum()), max(flag, 1.0 - flag))
+        score, red_flag = int(RISK_CLASSES[best]), bool(flag >= 0.5)
+        return {"risk_score": score, "red_flag": red_flag, **_estimate_text(text, score, red_flag)}, confidence
+
+    def save(self, path=CLASSIFIER_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, weights=self.weights, bias=self.bias, flag_weights=self.flag_weights,
+            flag_bias=np.array(self.flag_bias), meta=np.array(json.dumps(self.meta))
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=CLASSIFIER_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["weights"], data["bias"], data["flag_weights"], float(data["flag_bias"]),
+                json.loads(str(data["meta"]))
+            )
+
+
+def _estimate_text(text, score, red_flag):
+    """Explanation and suggestion of a classifier verdict: its score band and the risk terms found."""
+    band = next(name for lowest, name in _SCORE_BANDS if score >= lowest)
+    hits = get_keyword_automaton().match(text)
+    terms = sorted({kw for positions in hits.positions.values() for _, kw in positions})
+    signals = f"signal terms: {', '.join(terms)}" if terms else "no risk keywords matched"
+    flag = " and flags it as a potential red flag" if red_flag else ""
+    return {
+        "explanation": f"Local classifier estimate, not a full review: {band} risk ({score}/10){flag}, "
+                       f"based on wording similar to previously analysed clauses ({signals}).",
+        "suggestion": "Review this clause manually or re-run the analysis with the AI model before relying on it."
+                      if red_flag or band != "low" else "Likely standard wording; confirm it matches the agreed terms.",
+    }
+
+
+def load_training_samples(cache=None, prompt_version=None):
+    """(clause_text, language, analysis) rows from the clause analysis cache."""
+    from src.logic.analysis_cache import get_analysis_cache
+    from src.logic.risk_engine import PROMPT_VERSION
+
+    cache = cache or get_analysis_cache()
+    if not cache:
+        return []
+    version = PROMPT_VERSION if prompt_version is None else prompt_version
+    return [(text, lang, analysis) for text, lang, _, analysis in cache.entries(prompt_version=version)
+            if _sample_target(analysis) is not None]
+
+
+def train_classifier(samples, epochs=15, learning_rate=2.0, l2=1e-6, batch_size=256, min_steps=1000, seed=0):
+    """
+    Trains a ClauseClassifier with mini-batch SGD on sparse hashed features.
+    Args:
+        samples: Iterable of (clause_text, language, analysis dict).
+        min_steps: Small caches get extra epochs so the model still sees this many updates.
+    """
+    samples = list(samples)
+    if not samples:
+        raise ValueError("No training samples")
+    batch_size = max(1, min(batch_size, len(samples) // 10))
+    epochs = max(epochs, math.ceil(min_steps / math.ceil(len(samples) / batch_size)))
+    features = [hash_features(text) for text, _, _ in samples]
+    targets = [_sample_target(analysis) for _, _, analysis in samples]
+    scores = np.array([t[0] - 1 for t in targets])
+    flags = np.array([t[1] for t in targets], dtype=np.float32)
+
+    n_classes = len(RISK_CLASSES)
+    weights = np.zeros((N_FEATURES, n_classes), dtype=np.float32)
+    bias = np.log(np.bincount(scores, minlength=n_classes) + 1.0).astype(np.float32)
+    flag_weights = np.zeros(N_FEATURES, dtype=np.float32)
+    flag_bias = 0.0
+
+    rng = random.Random(seed)
+    order = list(range(len(samples)))
+    for epoch in range(epochs):
+        rng.shuffle(order)
+        lr = learning_rate / math.sqrt(1 + epoch)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            indices = np.concatenate([features[i][0] for i in batch])
+            values = np.concatenate([features[i][1] for i in batch])
+            rows = np.repeat(np.arange(len(batch)), [len(features[i][0]) for i in batch])
+
+            # Forward pass: per-row sums of the sparse feature x weight products
+            logits = np.zeros((len(batch), n_classes), dtype=np.float32)
+            np.add.at(logits, rows, values[:, None] * weights[indices])
+            flag_logit = np.bincount(rows, weights=values * flag_weights[indices], minlength=len(batch))
+
+            error = _softmax(logits + bias)
+            error[np.arange(len(batch)), scores[batch]] -= 1.0
+            flag_error = _sigmoid(flag_logit + flag_bias) - flags[batch]
+
+            # Sparse gradient step: only the features present in the batch move
+            touched, inverse = np.unique(indices, return_inverse=True)
+            grad = np.zeros((len(touched), n_classes), dtype=np.float32)
+            np.add.at(grad, inverse, values[:, None] * error[rows])
+            flag_grad = np.bincount(inverse, weights=values * flag_error[rows], minlength=len(touched))
+            scale = lr / len(batch)
+            weights[touched] -= scale * grad + lr * l2 * weights[touched]
+            flag_weights[touched] -= (scale * flag_grad + lr * l2 * flag_weights[touched]).astype(np.float32)
+            bias -= scale * error.sum(axis=0)
+            flag_bias -= scale * float(flag_error.sum())
+
+    meta = {"samples": len(samples), "epochs": epochs, "languages": sorted({lang for _, lang, _ in samples})}
+    return ClauseClassifier(weights, bias, flag_weights, flag_bias, meta)
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_clause_classifier():
+    """Returns the process-wide classifier loaded from CLASSIFIER_PATH (None until one is trained)."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            try:
+                _classifier = ClauseClassifier.load(CLASSIFIER_PATH)
+            except (OSError, ValueError, KeyError):
+                _classifier = False
+        return _classifier or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local clause classifier from cached LLM analyses.")
+    parser.add_argument("--output", default=CLASSIFIER_PATH)
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--min-samples", type=int, default=200)
+    args = parser.parse_args()
+
+    samples = load_training_samples()
+    if len(samples) < args.min_samples:
+        print(f"❌ Only {len(samples)} cached analyses for the current prompt version; need {args.min_samples}.")
+        return 1
+
+    print(f"Training on {len(samples)} cached analyses...")
+    model = train_classifier(samples, epochs=args.epochs)
+    model.save(args.output)
+    print(f"✅ Saved classifier to {args.output} (trained on {model.meta['samples']} clauses, languages: {', '.join(model.meta['languages'])})")
+    print("Run `python -m benchmarks.bench_classifier` for held-out accuracy and latency.")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
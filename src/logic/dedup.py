@@ -0,0 +1,97 @@
+import re
+import hashlib
+import threading
+
+from src.logic.analysis_cache import normalise_clause
+
+# MinHash / LSH parameters: 64 permutations in 16 bands of 4 rows finds pairs above
+# ~0.7 Jaccard with high probability; candidates are then checked against the threshold.
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_WORDS = 3
+DUPLICATE_THRESHOLD = 0.85
+
+_PRIME = (1 << 61) - 1
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _PRIME or 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _PRIME)
+    for i in range(NUM_PERM)
+]
+_WORD = re.compile(r'\w+')
+# Amounts, periods and currencies: clauses that differ in these are never merged, however similar
+_FIGURE = re.compile(r'\d+(?:[.,/:-]\d+)*|[$€£₹¥]|\b(?:rs|inr|usd|eur|gbp)\b')
+
+
+def _shingles(normalised):
+    words = _WORD.findall(normalised)
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(text):
+    """MinHash signature of the clause's word 3-shingles (leading number, case and spacing ignored)."""
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+              for s in _shingles(normalise_clause(text))]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """
+    Incremental LSH index: each new clause is either matched to an earlier
+    representative or becomes a representative itself. Works on streams, so
+    clauses can be deduplicated as they arrive from the segmenter. A match must
+    also contain exactly the same figures (numbers and currencies) in the same order.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._rows = NUM_PERM // BANDS
+        self._buckets = {}
+        self._signatures = {}
+        self._figures = {}
+        self._lock = threading.Lock()
+
+    def find_or_add(self, key, text):
+        """
+        Returns the key of a near-identical representative seen earlier, or None
+        (in which case `key` is registered as a new representative).
+        """
+        sig = minhash(text)
+        figures = _FIGURE.findall(normalise_clause(text))
+        bands = [(b, sig[b * self._rows:(b + 1) * self._rows]) for b in range(BANDS)]
+
+        with self._lock:
+            checked = set()
+            for band in bands:
+                for candidate in self._buckets.get(band, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    if self._figures[candidate] == figures and similarity(sig, self._signatures[candidate]) >= self.threshold:
+                        return candidate
+
+            self._signatures[key] = sig
+            self._figures[key] = figures
+            for band in bands:
+                self._buckets.setdefault(band, []).append(key)
+            return None
+
+
+def group_near_duplicates(texts, threshold=DUPLICATE_THRESHOLD):
+    """
+    Groups near-identical texts.
+    Returns:
+        list[list[int]]: Index groups in first-seen order; the first index of each group is its representative.
+    """
+    index = NearDuplicateIndex(threshold)
+    groups = {}
+    for i, text in enumerate(texts):
+        rep = index.find_or_add(i, text)
+        groups.setdefault(i if rep is None else rep, []).append(i)
+    return list(groups.values())
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import threading
+from collections import namedtuple, defaultdict
+
+KeywordRule = namedtuple("KeywordRule", ["keyword", "category", "weight"])
+
+# keyword -> category, weight. A keyword may appear under several categories.
+# Clause categories carry the heuristic risk score as their weight; the 'assessment'
+# category holds the whole-document risk terms counted by the overall assessment.
+# 'mask' phrases are never reported; keywords inside them don't count on their own.
+DEFAULT_RULES = [
+    KeywordRule("indemnify", "indemnity", 8),
+    KeywordRule("indemnity", "indemnity", 8),
+    KeywordRule("limit of liability", "indemnity", 8),
+    KeywordRule("terminate", "termination", 6),
+    KeywordRule("termination", "termination", 6),
+    KeywordRule("cancellation", "termination", 6),
+    KeywordRule("exclusive", "exclusivity", 7),
+    KeywordRule("non-compete", "exclusivity", 7),
+    KeywordRule("solicit", "exclusivity", 7),
+    KeywordRule("termination", "assessment", 1),
+    KeywordRule("liability", "assessment", 1),
+    KeywordRule("indemnity", "assessment", 1),
+    KeywordRule("dispute", "assessment", 1),
+    KeywordRule("court", "assessment", 1),
+    KeywordRule("exclusive", "assessment", 1),
+    KeywordRule("breach", "assessment", 1),
+    KeywordRule("exclusive jurisdiction", "mask", 0),  # a forum clause, not exclusivity
+]
+MASK_CATEGORY = "mask"
+# Keywords match whole words, optionally inflected with one of these endings
+# ('court' matches 'courts', 'solicit' matches 'solicitation' but not 'solicitor')
+KEYWORD_SUFFIXES = frozenset(["", "s", "es", "d", "ed", "ing", "ly", "ation"])
+
+# Optional JSON file of [keyword, category, weight] rows replacing DEFAULT_RULES
+KEYWORD_RULES_FILE = os.getenv("KEYWORD_RULES_FILE")
+
+
+def fold_case(text):
+    """Lowercases `text` keeping one character per input character, so offsets stay aligned."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters lowercase to two code points
+        lowered = "".join(ch.lower()[:1] for ch in text)
+    return lowered
+
+
+class KeywordMatches:
+    """
+    Result of one automaton pass: every rule hit with its position.
+    """
+
+    def __init__(self):
+        self.positions = defaultdict(list)  # category -> [(start, keyword)]
+        self.counts = defaultdict(int)      # category -> number of hits
+        self.weights = defaultdict(float)   # category -> sum of hit weights
+        self._max = {}
+
+    def _add(self, rule, start):
+        self.positions[rule.category].append((start, rule.keyword))
+        self.counts[rule.category] += 1
+        self.weights[rule.category] += rule.weight
+        self._max[rule.category] = max(self._max.get(rule.category, rule.weight), rule.weight)
+
+    def keywords(self, category):
+        """Distinct keywords of `category` found in the text."""
+        return {kw for _, kw in self.positions.get(category, [])}
+
+    def max_weight(self, category):
+        return self._max.get(category, 0)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def keyword_pattern(keyword):
+    """Regex matching `keyword` the way the automaton does: a whole word, optionally inflected."""
+    suffixes = "|".join(sorted((re.escape(x) for x in KEYWORD_SUFFIXES if x), key=len, reverse=True))
+    # The boundary before the keyword is checked behind it, so the pattern starts with the
+    # literal and `re` can search for it instead of trying every position
+    return re.compile(re.escape(keyword) + r'(?<!\w[\s\S]{%d})(?:%s)?(?!\w)' % (len(keyword), suffixes))
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick matcher over a rule table: finds every (possibly overlapping)
+    case-insensitive keyword occurrence in a single linear pass over the text.
+    Hits are then kept only on word boundaries (see KEYWORD_SUFFIXES) and outside 'mask' phrases.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = [KeywordRule(r[0].lower(), r[1], r[2]) for r in rules]
+        goto = [{}]
+        out = [[]]
+
+        # 1. Trie of keywords
+        for rule in self.rules:
+            state = 0
+            for ch in rule.keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].append(rule)
+
+        # 2. Failure links (BFS), folded into a full transition table so matching
+        #    costs one dict lookup per character
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = list(goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+            for ch, target in delta[fail[state]].items():
+                delta[state].setdefault(ch, target)
+
+        self._delta = delta
+        self._out = out
+
+    def match(self, text):
+        """
+        Returns:
+            KeywordMatches: per-category hit counts, weights and (start, keyword) positions.
+        """
+        lowered = fold_case(text)
+        delta, out = self._delta, self._out
+        root = delta[0]
+        state = 0
+        hits, masks = [], []
+        for i, ch in enumerate(lowered):
+            state = delta[state].get(ch) or root.get(ch, 0)
+            if out[state]:
+                for rule in out[state]:
+                    start = i - len(rule.keyword) + 1
+                    if start and _is_word_char(lowered[start - 1]):
+                        continue
+                    end = i + 1
+                    while end < len(lowered) and _is_word_char(lowered[end]):
+                        end += 1
+                    if lowered[i + 1:end] not in KEYWORD_SUFFIXES:
+                        continue
+                    if rule.category == MASK_CATEGORY:
+                        masks.append((start, i + 1))
+                    else:
+                        hits.append((start, i + 1, rule))
+
+        result = KeywordMatches()
+        for start, end, rule in hits:
+            if not any(m_start <= start and end <= m_end for m_start, m_end in masks):
+                result._add(rule, start)
+        return result
+
+
+def load_rules(path):
+    """Reads a rule table from a JSON list of [keyword, category, weight] rows."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [KeywordRule(*row) for row in json.load(f)]
+
+
+_automaton = None
+_automaton_lock = threading.Lock()
+
+
+def get_keyword_automaton():
+    """Returns the process-wide automaton built from KEYWORD_RULES_FILE or DEFAULT_RULES."""
+    global _automaton
+    with _automaton_lock:
+        if _automaton is None:
+            rules = load_rules(KEYWORD_RULES_FILE) if KEYWORD_RULES_FILE else DEFAULT_RULES
+            _automaton = KeywordAutomaton(rules)
+        return _automaton
@@ -0,0 +1,280 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+# Process-wide limits, shared by every Streamlit session
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 30.0
+
+# Tail latency: hedge a request once it has run longer than the model's p95
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 500
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError", "BadGateway", "GatewayTimeout"}
+
+
+def is_retryable(error):
+    """429 and 5xx responses from the Gemini API (google.api_core exceptions)."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in _RETRYABLE_STATUS:
+        return True
+    return type(error).__name__ in _RETRYABLE_NAMES
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute.
+    Only used from the client's event loop thread, so it needs no locking.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class LatencyTracker:
+    """Sliding window of call latencies for one model (seconds)."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    def summary(self):
+        return {
+            "count": len(self.samples),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def _model_name(model):
+    return getattr(model, "model_name", None) or type(model).__name__
+
+
+class AsyncLLMClient:
+    """
+    Asyncio request layer in front of Gemini, running on one background event loop per process.
+    Every call passes a global concurrency semaphore plus request/minute and token/minute
+    buckets, and 429/5xx errors are retried with exponential backoff and full jitter.
+    Synchronous callers (the Streamlit thread pools) use `generate`.
+    Each call can carry an end-to-end timeout and a per-request deadline, and with hedging enabled a duplicate request is sent
+    once the first has outlived the model's observed p95 latency; the first answer wins.
+    """
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_retries=LLM_MAX_RETRIES, hedge=LLM_HEDGE):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self._rpm = TokenBucket(requests_per_minute)
+        self._tpm = TokenBucket(tokens_per_minute)
+
+        # Counters (written on the loop thread, read anywhere)
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.latency = {}  # model name -> LatencyTracker
+
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)  # binds to the loop on first use
+        self._thread = threading.Thread(target=self._run_loop, name="llm-client", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _call(self, model, prompt):
+        if hasattr(model, "generate_content_async"):
+            return await model.generate_content_async(prompt)
+        return await self._loop.run_in_executor(None, model.generate_content, prompt)
+
+    async def _attempt(self, model, prompt, tokens, deadline=None):
+        queued_at = time.monotonic()
+        self.queued += 1
+        admitted = False
+        try:
+            async with self._semaphore:
+                await self._rpm.acquire(1)
+                await self._tpm.acquire(tokens)
+                self.queued -= 1
+                admitted = True
+                waited = time.monotonic() - queued_at
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                self.waits += 1
+
+                self.in_flight += 1
+                self.requests += 1
+                started = time.monotonic()
+                try:
+                    response = await asyncio.wait_for(self._call(model, prompt), deadline)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    raise TimeoutError(f"LLM call exceeded its {deadline:g}s deadline")
+                finally:
+                    self.in_flight -= 1
+                # Service time only (queueing excluded), so the percentiles describe the model
+                self.latency.setdefault(_model_name(model), LatencyTracker()).add(time.monotonic() - started)
+                return response
+        finally:
+            if not admitted:
+                self.queued -= 1
+
+    def _hedge_delay(self, model):
+        tracker = self.latency.get(_model_name(model))
+        if tracker is None or len(tracker.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None  # not enough history to know what "slow" means yet
+        return tracker.percentile(95)
+
+    async def _hedged_attempt(self, model, prompt, tokens, deadline, hedge):
+        delay = self._hedge_delay(model) if hedge else None
+        if delay is None:
+            return await self._attempt(model, prompt, tokens, deadline)
+
+        primary = asyncio.ensure_future(self._attempt(model, prompt, tokens, deadline))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or self.queued:
+            # Finished, or the limits are saturated and a duplicate would only add load
+            return await primary
+
+        self.hedges += 1
+        backup = asyncio.ensure_future(self._attempt(model, prompt, tokens, deadline))
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_async(self, model, prompt, tokens=None, deadline=None, hedge=None, timeout=None):
+        """
+        Args:
+            deadline: Seconds each request may run once admitted (queueing behind the shared
+                limits does not count); a request that overruns raises TimeoutError and is not retried.
+            hedge: Override the client-wide hedging setting for this call.
+            timeout: Seconds the whole call may take end to end, queueing, retries and backoff
+                included; when it passes the call is cancelled and TimeoutError is raised.
+        """
+        call = asyncio.ensure_future(self._generate_with_retries(model, prompt, tokens, deadline, hedge))
+        try:
+            done, _ = await asyncio.wait({call}, timeout=timeout)
+            if not done:
+                self.timeouts += 1
+                self.failures += 1
+                raise TimeoutError(f"LLM call did not finish within {timeout:g}s")
+            return call.result()
+        finally:
+            call.cancel()
+
+    async def _generate_with_retries(self, model, prompt, tokens, deadline, hedge):
+        tokens = tokens or len(prompt) // 4 + 1
+        hedge = self.hedge if hedge is None else hedge
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._hedged_attempt(model, prompt, tokens, deadline, hedge)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.failures += 1
+                    raise
+                if getattr(e, "code", None) == 429 or type(e).__name__ in ("ResourceExhausted", "TooManyRequests"):
+                    self.throttled += 1
+                self.retries += 1
+                # Full jitter: sleep uniformly in [0, min(cap, base * 2^attempt)]
+                await asyncio.sleep(random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+    def generate(self, model, prompt, tokens=None, timeout=None, hedge=None, deadline=None):
+        """
+        Blocking wrapper for thread-pool callers; raises the final error after retries.
+        `timeout` bounds the whole call, time spent waiting for the shared limits included, and
+        `deadline` each admitted request (see `generate_async`); either cancels the call on the loop.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.generate_async(model, prompt, tokens, deadline, hedge, timeout), self._loop
+        )
+        return future.result()
+
+    def latency_percentiles(self):
+        """model name -> {'count', 'p50', 'p95', 'p99'} over the recent window."""
+        return {name: tracker.summary() for name, tracker in list(self.latency.items())}
+
+    def stats(self):
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "avg_wait_seconds": self.total_wait / self.waits if self.waits else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency_percentiles(),
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Returns the process-wide LLM client (one event loop, one set of limits)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncLLMClient()
+        return _client
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import google.generativeai as genai
+
+# Preferred models, best first. Probed once per API key.
+MODEL_VARIATIONS = [
+    'gemini-2.0-flash',
+    'gemini-2.5-flash',
+    'gemini-2.0-flash-exp',
+    'gemini-1.5-flash',
+    'gemini-pro'
+]
+
+
+def is_model_not_found(error):
+    """True for 404 / NotFound errors, i.e. the resolved model was withdrawn or renamed."""
+    if getattr(error, "code", None) == 404 or type(error).__name__ == "NotFound":
+        return True
+    message = str(error).lower()
+    return "not found" in message and "model" in message
+
+
+class ModelRegistry:
+    """
+    Resolves and caches a working GenerativeModel per API key.
+    The variations list is walked once (lazily, on first use) instead of on every call;
+    callers invalidate the entry after a model-not-found error to trigger a re-probe.
+    """
+
+    def __init__(self, variations=MODEL_VARIATIONS):
+        self.variations = list(variations)
+        self._models = {}
+        self._configured = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(api_key):
+        return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+    def _configure(self, api_key):
+        # genai.configure is process-global; only redo it when the key actually changes
+        if self._configured != api_key:
+            genai.configure(api_key=api_key)
+            self._configured = api_key
+
+    def _probe(self):
+        """
+        Returns (model name, confirmed). Unconfirmed results (network/auth errors) are not cached.
+        """
+        for v in self.variations:
+            name = v if v.startswith('models/') else f"models/{v}"
+            try:
+                genai.get_model(name)
+                return name, True
+            except Exception as e:
+                if is_model_not_found(e):
+                    continue
+                break
+        return f"models/{self.variations[0]}", False
+
+    def get(self, api_key):
+        """Returns the cached model for `api_key`, probing the variations on first use."""
+        fp = self._fingerprint(api_key)
+        with self._lock:
+            self._configure(api_key)
+            model = self._models.get(fp)
+            if model is None:
+                name, confirmed = self._probe()
+                model = genai.GenerativeModel(name)
+                if confirmed:
+                    self._models[fp] = model
+            return model
+
+    def peek(self, api_key):
+        """The already-resolved model for `api_key`, or None; never probes."""
+        with self._lock:
+            return self._models.get(self._fingerprint(api_key))
+
+    def invalidate(self, api_key):
+        """Forget the model for `api_key` so the next `get` re-probes."""
+        with self._lock:
+            self._models.pop(self._fingerprint(api_key), None)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Returns the process-wide model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -1,51 +1,370 @@
 import re
-from langdetect import detect
+import bisect
+from datetime import date
+from collections import namedtuple
+
+EntityMatch = namedtuple("EntityMatch", ["label", "text", "start", "end", "value"])
+
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_CURRENCIES = {"$": "USD", "USD": "USD", "Rs.": "INR", "INR": "INR"}
+# Jurisdictions commonly named in Indian contracts -> canonical name
+_GPE_NAMES = {
+    "India": "India", "New Delhi": "New Delhi", "Delhi": "Delhi", "Mumbai": "Mumbai", "Bombay": "Mumbai",
+    "Bengaluru": "Bengaluru", "Bangalore": "Bengaluru", "Chennai": "Chennai", "Madras": "Chennai",
+    "Kolkata": "Kolkata", "Calcutta": "Kolkata", "Hyderabad": "Hyderabad", "Pune": "Pune",
+    "Ahmedabad": "Ahmedabad", "Gurugram": "Gurugram", "Gurgaon": "Gurugram", "Noida": "Noida",
+    "Maharashtra": "Maharashtra", "Karnataka": "Karnataka", "Tamil Nadu": "Tamil Nadu",
+    "Telangana": "Telangana", "Gujarat": "Gujarat", "West Bengal": "West Bengal", "Kerala": "Kerala",
+    "Uttar Pradesh": "Uttar Pradesh", "Haryana": "Haryana", "Rajasthan": "Rajasthan",
+    "Singapore": "Singapore", "United States": "United States", "United Kingdom": "United Kingdom",
+    "England": "England", "USA": "United States", "UAE": "United Arab Emirates", "Dubai": "Dubai",
+}
+
+_MONEY_PATTERN = r'(?P<cur>\$|Rs\.|INR|USD)\s?(?P<amt>\d+(?:,\d+)*(?:\.\d+)?)'
+_DATE_PATTERN = (
+    r'(?P<day>\d\d?)(?:(?P<dnum>[/-](?P<mon>\d{1,2})[/-](?P<yr>\d{2,4}))'
+    r'|(?P<dtxt> (?P<mname>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*) (?P<tyr>\d{4})\b))'
+)
+_PARTY_PATTERN = r'[A-Z][a-z]+ (?:Co\.|Ltd\.|Inc\.|LLP|Corp\.|Private Limited|Limited)(?!\w)'
+_GPE_PATTERN = r'(?:' + "|".join(sorted(map(re.escape, _GPE_NAMES), key=len, reverse=True)) + r')\b'
+
+# What the scanner finds: one alternation of every entity type, matched left to right,
+# money first and the word-anchored types after a \b.
+_ENTITY_SCANNER = re.compile(
+    r'(?P<money>' + _MONEY_PATTERN + r')'
+    r'|\b(?:' + _DATE_PATTERN + r'|(?P<party>' + _PARTY_PATTERN + r')|(?P<gpe>' + _GPE_PATTERN + r'))'
+)
+# The same branches as separate patterns. Each starts with a literal or a small character set,
+# so `re` skips ahead to candidate positions instead of trying every branch at every word
+# boundary, which makes them faster together than the alternation on its own. A leading \b
+# would disable that skip, so the boundary before dates, parties and places is checked in code.
+# (pattern, kind or None to take it from the match, needs a word boundary before it)
+_ENTITY_PASSES = (
+    (re.compile(_MONEY_PATTERN), "money", False),
+    (re.compile(_DATE_PATTERN), None, True),
+    (re.compile(_PARTY_PATTERN), "party", True),
+    (re.compile(_GPE_PATTERN), "gpe", True),
+)
+_BETWEEN = re.compile(r'\b[Bb](?i:etween)\s+(?P<p1>[^,;\n]+?)(?:\s+and\s+|\s*,\s*)(?P<p2>[^,.;\n]+)')
+_LABELS = {"money": "MONEY", "dnum": "DATES", "dtxt": "DATES", "party": "PARTIES", "gpe": "GPE"}
+# Two-digit years: 00-49 are read as 20xx, 50-99 as 19xx
+TWO_DIGIT_YEAR_PIVOT = 50
+
+
+def _entity_matches(text):
+    """(start, end, kind, match) per entity in text order, as `_ENTITY_SCANNER` finds them."""
+    found = []
+    for priority, (pattern, kind, bounded) in enumerate(_ENTITY_PASSES):
+        for m in pattern.finditer(text):
+            start = m.start()
+            if bounded and start and (text[start - 1].isalnum() or text[start - 1] == "_"):
+                # Mid-word: the alternation would skip it and may find a shorter match inside it
+                return _scan_combined(text)
+            found.append((start, priority, m.end(), kind or m.lastgroup, m))
+    found.sort()  # (start, priority) is unique, so match objects are never compared
+
+    # Leftmost match wins, ties go to the earlier branch, as in the alternation. That holds as
+    # long as a dropped match ends within the kept one; one that runs past it may have hidden
+    # a later match of its own pattern, so such texts are rescanned with the alternation.
+    kept, end = [], 0
+    for start, _, stop, kind, m in found:
+        if start >= end:
+            kept.append((start, stop, kind, m))
+            end = stop
+        elif stop > end:
+            return _scan_combined(text)
+    return kept
+
+
+def _scan_combined(text):
+    return [(m.start(), m.end(), m.lastgroup, m) for m in _ENTITY_SCANNER.finditer(text)]
+
+
+def _iso_date(year, month, day):
+    if year < 100:
+        year += 2000 if year < TWO_DIGIT_YEAR_PIVOT else 1900
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _normalise(kind, m):
+    if kind == "money":
+        return (float(m.group("amt").replace(",", "")), _CURRENCIES[m.group("cur")])
+    if kind == "dnum":
+        day, month = int(m.group("day")), int(m.group("mon"))
+        if month > 12 >= day:
+            day, month = month, day  # US-style month/day
+        return _iso_date(int(m.group("yr")), month, day)
+    if kind == "dtxt":
+        month = _MONTHS.index(m.group("mname")[:3].lower()) + 1
+        return _iso_date(int(m.group("tyr")), month, int(m.group("day")))
+    if kind == "party":
+        return " ".join(m.group().split())
+    return _GPE_NAMES[m.group()]
+
+
+def scan_entities(text):
+    """
+    Finds MONEY, DATES, PARTIES and GPE in one left-to-right scan (see `_ENTITY_SCANNER`);
+    where two candidates overlap, the one starting first wins, then the earlier type in that order.
+    Two-digit years are read with `TWO_DIGIT_YEAR_PIVOT`, and impossible dates normalise to None.
+    Returns:
+        list[EntityMatch]: Typed matches in text order with character offsets and a normalised
+        value (MONEY -> (amount, currency), DATES -> ISO date or None, PARTIES/GPE -> canonical name).
+        The first 'between X and Y' recital is reported as two 'PARTY_HINT' matches.
+    """
+    entities = _entity_matches(text)
+    matches = [EntityMatch(_LABELS[kind], m.group(), start, end, _normalise(kind, m))
+               for start, end, kind, m in entities]
+
+    # The recital's hints go where the word 'between' is, ahead of the parties it names
+    between = _BETWEEN.search(text)
+    if between:
+        at = bisect.bisect_left([item[0] for item in entities], between.start())
+        matches[at:at] = [EntityMatch("PARTY_HINT", between.group(g), between.start(g), between.end(g), between.group(g).strip())
+                          for g in ("p1", "p2")]
+    return matches
+
 
 def extract_entities(text):
     """
     Heuristic-based entity extraction (No Heavy Dependencies).
     Extracts PARTIES (ORG/PERSON), DATES, MONEY, and GPE.
+    Same scan as `scan_entities`, without building offsets/normalised values;
+    results are de-duplicated in order of first appearance.
     """
-    entities = {
-        "PARTIES": [],
-        "DATES": [],
-        "MONEY": [],
-        "GPE": [] 
+    # dicts as ordered sets
+    found = {
+        "PARTIES": {},
+        "DATES": {},
+        "MONEY": {},
+        "GPE": {}
     }
-    
-    # 1. Extract Money (e.g., $100, Rs. 500, 10,000 USD)
-    money_pattern = r'(\$|Rs\.|INR|USD)\s?\d+(?:,\d+)*(?:\.\d+)?'
-    entities["MONEY"] = list(set(re.findall(money_pattern, text)))
-
-    # 2. Extract Dates (e.g., 12/05/2023, Jan 1st, 2024, 20-Oct-2022)
-    date_pattern = r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4})|(?:\d{1,2} (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{4})\b'
-    entities["DATES"] = list(set(re.findall(date_pattern, text)))
+    for _, _, kind, m in _entity_matches(text):
+        found[_LABELS[kind]][m.group()] = None
 
-    # 3. Simple Parties (Capitalized words followed by Co, Ltd, Inc, Private)
-    party_pattern = r'\b[A-Z][a-z]+ (?:Co\.|Ltd\.|Inc\.|LLP|Corp\.|Private Limited|Limited)\b'
-    entities["PARTIES"] = list(set(re.findall(party_pattern, text)))
+    entities = {label: list(values) for label, values in found.items()}
 
-    # 4. Fallback: If nothing found, look for common patterns like "between [X] and [Y]"
+    # Fallback: If no parties found, use the "between [X] and [Y]" recital
     if not entities["PARTIES"]:
-        between_match = re.search(r'between\s+([^,and]+)(?:\s+and\s+|\s*,\s*)([^,.]+)', text, re.IGNORECASE)
-        if between_match:
-            entities["PARTIES"] = [between_match.group(1).strip(), between_match.group(2).strip()]
+        between = _BETWEEN.search(text)
+        if between:
+            entities["PARTIES"] = [between.group("p1").strip(), between.group("p2").strip()]
 
     return entities
 
+# Script-based language detection
+_DEVANAGARI = re.compile(r'[\u0900-\u097F]')
+_LATIN = re.compile(r'[A-Za-z\u00C0-\u024F]')
+HINDI_SCRIPT_SHARE = 0.6    # Devanagari share of letters at/above which text is Hindi
+ENGLISH_SCRIPT_SHARE = 0.2  # ... at/below which it is English; in between is ambiguous
+LANG_SAMPLE_WINDOWS = 8
+LANG_SAMPLE_CHARS = 2500
+
+
+def _sample(text):
+    """Evenly spaced windows across the document, so page 1 alone doesn't decide."""
+    if len(text) <= LANG_SAMPLE_WINDOWS * LANG_SAMPLE_CHARS:
+        return text
+    step = len(text) // LANG_SAMPLE_WINDOWS
+    return "".join(text[i:i + LANG_SAMPLE_CHARS] for i in range(0, len(text), step))
+
+
+def _devanagari_share(text):
+    """Devanagari letters / (Devanagari + Latin letters), or None if there are no letters."""
+    dev = len(_DEVANAGARI.findall(text))
+    total = dev + len(_LATIN.findall(text))
+    return dev / total if total else None
+
+
+def _classify(share):
+    """'en', 'hi', or None when the script ratio doesn't decide (mixed scripts, or no letters)."""
+    if share is None:
+        return None
+    if share <= ENGLISH_SCRIPT_SHARE:
+        return "en"
+    if share >= HINDI_SCRIPT_SHARE:
+        return "hi"
+    return None
+
+
 def detect_language(text):
     """
     Detects the language of the text.
+    Decides from the Devanagari vs Latin letter ratio over a sample of the whole document;
+    only a genuinely mixed sample falls back to langdetect, seeded so results are repeatable.
+    Text without letters is treated as English.
     """
-    try:
-        lang = detect(text[:500])
+    sample = _sample(text)
+    share = _devanagari_share(sample)
+    if share is None:
+        return "en"
+    lang = _classify(share)
+    if lang:
         return lang
-    except:
+
+    try:
+        from langdetect import DetectorFactory, detect
+        DetectorFactory.seed = 0
+        return detect(sample)
+    except Exception:
         return "en"
 
+
+def detect_clause_language(text, default="en"):
+    """
+    Per-clause language for routing mixed Hindi/English contracts clause by clause.
+    Uses the script ratio only; ambiguous clauses and clauses without letters keep the
+    document language.
+    """
+    return _classify(_devanagari_share(text)) or default
+
+
+Clause = namedtuple("Clause", ["text", "start", "end", "number", "level", "path"])
+
+MIN_CLAUSE_CHARS = 50
+MAX_CLAUSE_CHARS = 3000
+
+_HEADING = re.compile(
+    r'^(?P<kw>ARTICLE|Article|SECTION|Section|SCHEDULE|Schedule|ANNEXURE|Annexure|APPENDIX|Appendix|EXHIBIT|Exhibit)'
+    r'\s+(?P<id>[IVXLC]+|\d+|[A-Z])\b[.:)\-\u2013\u2014]*\s*'
+)
+_NUMBERED = re.compile(r'^(?P<num>\d{1,3}(?:\.\d{1,3})+\.?|\d{1,3}[.)])\s+')
+_LETTERED = re.compile(r'^(?:\((?P<paren>[a-z]{1,4})\)|(?P<bare>[a-z])\))\s+')
+_ROMAN = {"i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x", "xi", "xii"}
+
+
+class _Segmenter:
+    """
+    Line-level state machine behind `iter_clauses`.
+    Numbering markers (1., 1.1, (a), (iv), Article IV, Schedule 2) start clauses and
+    maintain the hierarchy; unnumbered wrapped lines are merged into the open clause.
+    """
+
+    def __init__(self):
+        self.stack = []       # [(level, marker)] ancestors of the open clause
+        self.parts = []       # stripped lines of the open clause
+        self.start = self.end = 0
+        self.number = None
+        self.level = 0
+        self.last_alpha = None
+        self.base = 0         # level of the last numbered/heading marker
+        self.widest = 0
+        self.prev_short = False
+
+    def _marker(self, line):
+        m = _HEADING.match(line)
+        if m:
+            self.base, self.last_alpha = 0, None
+            return f"{m.group('kw').title()} {m.group('id')}", 0, True
+        m = _NUMBERED.match(line)
+        if m:
+            num = m.group("num").rstrip(".)")
+            self.base, self.last_alpha = num.count(".") + 1, None
+            return num, self.base, False
+        m = _LETTERED.match(line)
+        if m:
+            token = m.group("paren") or m.group("bare")
+            is_roman = token in _ROMAN and not (
+                self.last_alpha and len(token) == 1 and ord(token) == ord(self.last_alpha) + 1
+            )
+            if not is_roman:
+                self.last_alpha = token
+            return f"({token})", self.base + (2 if is_roman else 1), False
+        return None
+
+    def _flush(self):
+        clause = None
+        if self.parts:
+            text = ""
+            for part in self.parts:
+                # PDF hyphenation: "indem-" + "nify" -> keep the hyphen, drop the wrap
+                text += part if not text or text.endswith("-") else " " + part
+            if len(text) > MIN_CLAUSE_CHARS:
+                path = tuple(marker for _, marker in self.stack)
+                clause = Clause(text, self.start, self.end, self.number, self.level, path)
+        self.parts = []
+        self.number = None
+        return clause
+
+    def feed(self, line, offset):
+        """Consumes one raw line starting at `offset`; returns a finished Clause or None."""
+        stripped = line.strip()
+        if not stripped:
+            return self._flush()
+
+        lstart = offset + (len(line) - len(line.lstrip()))
+        lend = lstart + len(stripped)
+        self.widest = max(self.widest, len(stripped))
+        done = None
+
+        marker = self._marker(stripped)
+        if marker:
+            done = self._flush()
+            number, level, is_heading = marker
+            while self.stack and self.stack[-1][0] >= level:
+                self.stack.pop()
+            self.stack.append((level, number))
+            if is_heading:
+                if len(stripped) <= 80:
+                    # A title line ("ARTICLE IV - INDEMNITY") labels what follows
+                    self.prev_short = True
+                    return done
+            self.number, self.level = number, level
+        elif stripped.isupper() and len(stripped) <= 60:
+            # Unnumbered ALL-CAPS title
+            self.prev_short = True
+            return self._flush()
+        elif self.parts:
+            text_len = sum(len(p) + 1 for p in self.parts)
+            sentence_end = self.parts[-1][-1] in ".;:"
+            if sentence_end and ((self.prev_short and stripped[0].isupper()) or text_len > MAX_CLAUSE_CHARS):
+                done = self._flush()
+
+        if not self.parts:
+            self.start = lstart
+            if not marker:
+                # Unnumbered paragraph: one level below the enclosing marker
+                self.number, self.level = None, (self.stack[-1][0] + 1 if self.stack else 0)
+        self.parts.append(stripped)
+        self.end = lend
+        # A line well short of the page width usually ends a paragraph
+        self.prev_short = len(stripped) < 0.75 * self.widest
+        return done
+
+
+def iter_clauses(chunks):
+    """
+    Structure-aware streaming clause segmenter over text chunks
+    (e.g. pages from `iter_text_from_file`).
+    Merges PDF-wrapped lines back into whole clauses using numbering (1., 1.1, (a), Article IV,
+    Schedule) and paragraph shape; a line cut at a chunk boundary is held until the next chunk.
+    Yields:
+        Clause: text plus start/end offsets into the concatenated chunks, its number,
+        nesting level and the path of enclosing markers, e.g. ('Article IV', '4.1', '(a)').
+    """
+    seg = _Segmenter()
+    pending = ""
+    offset = 0
+
+    for chunk in chunks:
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            clause = seg.feed(line, offset)
+            offset += len(line) + 1
+            if clause:
+                yield clause
+
+    for clause in (seg.feed(pending, offset), seg._flush()):
+        if clause:
+            yield clause
+
+
 def split_into_clauses(text):
     """
     Splits text into clauses based on paragraph breaks and numbering.
     """
-    paragraphs = [p.strip() for p in text.split('\n') if len(p.strip()) > 50]
-    return paragraphs
+    return [clause.text for clause in iter_clauses([text])]
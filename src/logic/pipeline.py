@@ -0,0 +1,263 @@
+import os
+import time
+import heapq
+import queue
+import itertools
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.logic.risk_engine import (
+    analyze_risks_batch, pack_batches, estimate_clause_tokens, estimate_clause_risk, triage_clause, _heuristic_fallback,
+    BATCH_TOKEN_BUDGET, BATCH_MAX_CLAUSES, TRIAGE_LOW_THRESHOLD, TRIAGE_HIGH_THRESHOLD
+)
+from src.logic.nlp_processor import detect_clause_language
+from src.logic.dedup import NearDuplicateIndex
+from src.logic.clause_classifier import get_clause_classifier, CLASSIFIER_MIN_CONFIDENCE
+
+# The first batch is kept small so the first results don't wait for a full prompt's worth of pages
+FIRST_BATCH_CLAUSES = 2
+
+# Per-document budget: once either is spent, clauses still queued get the heuristic analysis
+DOC_TIME_BUDGET_SECONDS = float(os.getenv("DOC_TIME_BUDGET_SECONDS", "180"))
+DOC_TOKEN_BUDGET = int(os.getenv("DOC_TOKEN_BUDGET", "400000"))
+# How long a part-filled batch waits for more clauses while extraction is still running
+BATCH_LINGER_SECONDS = 0.5
+
+# Tuning of `iter_analyzed_clauses`:
+#   batch_clauses / token_budget: per-request batch limits (see `analyze_risks_batch`; 1 clause disables batching)
+#   triage, triage_low, triage_high: resolve clauses the keyword heuristics score confidently (see `triage_clause`)
+#   classifier, classifier_min_confidence: answer with the distilled local model when it is confident enough
+#   time_budget / cost_budget: seconds and estimated tokens after which queued clauses get the heuristic analysis
+AnalysisOptions = namedtuple(
+    "AnalysisOptions",
+    ["batch_clauses", "token_budget", "triage", "triage_low", "triage_high",
+     "classifier", "classifier_min_confidence", "time_budget", "cost_budget"],
+    defaults=[BATCH_MAX_CLAUSES, BATCH_TOKEN_BUDGET, True, TRIAGE_LOW_THRESHOLD, TRIAGE_HIGH_THRESHOLD,
+              True, CLASSIFIER_MIN_CONFIDENCE, DOC_TIME_BUDGET_SECONDS, DOC_TOKEN_BUDGET]
+)
+
+
+def _record(index, clause, language, analysis, duplicate_of=None, tier="llm"):
+    return {
+        "index": index,
+        "text": clause.text,
+        "analysis": analysis,
+        "language": language,
+        "number": clause.number,
+        "path": list(clause.path),
+        "start": clause.start,
+        "end": clause.end,
+        "duplicate_of": duplicate_of,
+        "tier": tier,
+    }
+
+
+def iter_analyzed_clauses(clauses, lang="en", max_workers=6, limit=None, dedupe=True, options=None, progress=None):
+    """
+    Incremental analysis stage: clause iterator in, analysed records out, riskiest clauses first.
+    Near-duplicates are analysed once; triage and the local classifier answer confident clauses
+    without the LLM, and clauses still queued once the budget is spent get the heuristic analysis
+    (see `AnalysisOptions`). `progress`, if given, gets 'total' and 'complete' as clauses are read.
+    Yields:
+        dict: {'index', 'text', 'analysis', 'language', 'number', 'path', 'start', 'end', 'duplicate_of', 'tier'}
+        per clause in completion order; 'tier' is 'llm', 'heuristic', 'classifier', 'budget' or
+        'fallback' (heuristic answer because the LLM was unavailable).
+    """
+    options = options or AnalysisOptions()
+    results = queue.Queue()
+    done = object()
+    index = NearDuplicateIndex() if dedupe else None
+    started = time.monotonic()
+    model = get_clause_classifier() if options.classifier else None
+
+    # Priority queue of (-risk, index, clause, future, language), shared by producer and workers
+    pending = []
+    ready = threading.Condition()
+    state = {"producing": True, "since": 0.0, "sent_any": False, "spent": 0, "exhausted": False}
+    # Set when the consumer stops early (closed generator, error): no new requests are started
+    cancelled = threading.Event()
+    if progress is not None:
+        progress.update(total=0, complete=False)
+
+    def run_batch(items, batch_lang):
+        try:
+            analyses = analyze_risks_batch([clause.text for _, clause, _ in items], lang=batch_lang)
+            for (i, clause, future), analysis in zip(items, analyses):
+                # The backend was unavailable or unusable for this clause
+                tier = "fallback" if analysis.get("source") == "heuristic" else "llm"
+                future.set_result(_record(i, clause, batch_lang, analysis, tier=tier))
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+    def skip_batch(items, batch_lang):
+        for i, clause, future in items:
+            future.set_result(_record(i, clause, batch_lang, _heuristic_fallback(clause.text), tier="budget"))
+
+    def fan_out(i, clause, rep_future):
+        copy = Future()
+
+        def reuse(f):
+            try:
+                rep = f.result()
+                copy.set_result(_record(i, clause, rep["language"], dict(rep["analysis"]), duplicate_of=rep["index"], tier=rep["tier"]))
+            except Exception as e:
+                copy.set_exception(e)
+
+        copy.add_done_callback(results.put)
+        rep_future.add_done_callback(reuse)
+
+    def batch_cap():
+        return min(options.batch_clauses, FIRST_BATCH_CLAUSES) if not state["sent_any"] else options.batch_clauses
+
+    def take_batch():
+        # Caller holds `ready`. Pops the top clause plus the next ones in priority order that
+        # share its language, and keeps as many as `pack_batches` puts in the first request.
+        first = heapq.heappop(pending)
+        batch_lang = first[4]
+        candidates, put_back = [first], []
+        cap = batch_cap()
+        while pending and len(candidates) < cap:
+            item = heapq.heappop(pending)
+            (candidates if item[4] == batch_lang else put_back).append(item)
+        texts = [item[2].text for item in candidates]
+        size = len(pack_batches(texts, options.token_budget, cap)[0])
+        for item in put_back + candidates[size:]:
+            heapq.heappush(pending, item)
+        state["sent_any"] = True
+        tokens = sum(estimate_clause_tokens(text) for text in texts[:size])
+        return [(i, clause, future) for _, i, clause, future, _ in candidates[:size]], batch_lang, tokens
+
+    def work():
+        try:
+            while True:
+                with ready:
+                    while True:
+                        if cancelled.is_set():
+                            return
+                        if not pending:
+                            if not state["producing"]:
+                                return
+                            ready.wait()
+                            continue
+                        lingered = time.monotonic() - state["since"]
+                        if not state["producing"] or len(pending) >= batch_cap() or lingered >= BATCH_LINGER_SECONDS:
+                            break
+                        ready.wait(BATCH_LINGER_SECONDS - lingered)
+                    items, batch_lang, tokens = take_batch()
+                    if pending:
+                        state["since"] = time.monotonic()
+                    if not state["exhausted"]:
+                        over_time = time.monotonic() - started > options.time_budget
+                        state["exhausted"] = over_time or state["spent"] + tokens > options.cost_budget
+                    if not state["exhausted"]:
+                        state["spent"] += tokens
+                    exhausted = state["exhausted"]
+
+                if cancelled.is_set():
+                    return
+                if exhausted:
+                    skip_batch(items, batch_lang)
+                else:
+                    run_batch(items, batch_lang)
+        except Exception as e:
+            results.put(e)
+
+    def produce():
+        # Runs on its own thread so extraction never blocks delivery of finished analyses
+        submitted = 0
+        futures = {}
+        try:
+            for i, clause in enumerate(itertools.islice(clauses, limit)):
+                if cancelled.is_set():
+                    break
+                submitted += 1
+                if progress is not None:
+                    progress["total"] = submitted
+                rep = index.find_or_add(i, clause.text) if index else None
+                if rep is not None:
+                    fan_out(i, clause, futures[rep])
+                    continue
+
+                future = futures[i] = Future()
+                future.add_done_callback(results.put)
+                clause_lang = detect_clause_language(clause.text, default=lang)
+                risk = None
+                if options.triage:
+                    decision = triage_clause(clause.text, clause_lang, options.triage_low, options.triage_high)
+                    if decision.route == "local":
+                        future.set_result(_record(i, clause, clause_lang, decision.analysis, tier="heuristic"))
+                        continue
+                    risk = decision.risk
+                if model is not None:
+                    analysis, confidence = model.predict(clause.text, clause_lang)
+                    if analysis is not None and confidence >= options.classifier_min_confidence:
+                        future.set_result(_record(i, clause, clause_lang, analysis, tier="classifier"))
+                        continue
+                if risk is None:
+                    # Keyword rules are English-only; other languages queue mid-priority
+                    risk = estimate_clause_risk(clause.text) if clause_lang == "en" else 0.5
+
+                with ready:
+                    if cancelled.is_set():
+                        break
+                    if not pending:
+                        state["since"] = time.monotonic()
+                    heapq.heappush(pending, (-risk, i, clause, future, clause_lang))
+                    ready.notify()
+        except Exception as e:
+            results.put(e)
+        finally:
+            with ready:
+                state["producing"] = False
+                ready.notify_all()
+            if progress is not None:
+                progress["complete"] = True
+            results.put((done, submitted))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    threading.Thread(target=produce, daemon=True).start()
+    for _ in range(max_workers):
+        executor.submit(work)
+
+    try:
+        received, expected = 0, None
+        while expected is None or received < expected:
+            item = results.get()
+            if isinstance(item, tuple) and item[0] is done:
+                expected = item[1]
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                received += 1
+                yield item.result()
+    finally:
+        # An abandoned document (e.g. a Streamlit rerun mid-analysis) must not keep the caller
+        # waiting or keep spending LLM quota: drop queued clauses and let in-flight batches finish alone
+        cancelled.set()
+        with ready:
+            pending.clear()
+            ready.notify_all()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def triaged_locally(records):
+    """Number of clause analyses resolved without the LLM (heuristic triage or local classifier)."""
+    return sum(1 for r in records if r.get("tier") in ("heuristic", "classifier") and r.get("duplicate_of") is None)
+
+
+def llm_answered(records):
+    """Number of clause analyses that came from the LLM (or its cache), not from a local fallback."""
+    return sum(1 for r in records if r.get("tier") == "llm" and r.get("duplicate_of") is None)
+
+
+def coverage(records):
+    """Number of clauses that got an LLM or triage verdict rather than a budget fallback."""
+    return sum(1 for r in records if r.get("tier") != "budget")
+
+
+def api_calls_saved(records):
+    """Number of clause analyses served from a near-duplicate representative."""
+    return sum(1 for r in records if r.get("duplicate_of") is not None)
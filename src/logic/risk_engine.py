@@ -1,8 +1,50 @@
 import os
 import json
-import google.generativeai as genai
+import math
+import time
+import threading
+from collections import namedtuple
 from dotenv import load_dotenv
 
+from src.logic.keyword_matcher import get_keyword_automaton
+from src.logic.analysis_cache import get_analysis_cache
+from src.logic.llm_client import get_llm_client
+from src.logic.model_registry import get_model_registry, is_model_not_found, MODEL_VARIATIONS
+
+# Bump whenever the clause prompt changes, so cached analyses from the old prompt are not reused
+PROMPT_VERSION = "1"
+
+# Batched clause prompts
+BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "8000"))
+BATCH_MAX_CLAUSES = int(os.getenv("BATCH_MAX_CLAUSES", "20"))
+# A batch that failed outright is retried once as a batch after this pause; clauses still
+# missing after that are sent one per request, after twice the pause
+BATCH_RETRY_BACKOFF_SECONDS = float(os.getenv("BATCH_RETRY_BACKOFF_SECONDS", "2"))
+_OUTPUT_TOKENS_PER_CLAUSE = 120  # room for one JSON result object
+
+# Per-request deadlines (seconds of model time); an overrun falls back to the heuristic
+CLAUSE_DEADLINE_SECONDS = float(os.getenv("CLAUSE_DEADLINE_SECONDS", "20"))
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "60"))
+# End-to-end limit per call: waiting for a slot under the shared rate limits, retries and backoff included
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "180"))
+
+# Triage: clauses whose heuristic risk estimate is at or below LOW, or at or above HIGH,
+# are resolved locally; only the band in between is sent to the LLM (0 / 1 disables triage).
+# The low band is off by default: missing the few risk keywords is no evidence that a clause is
+# safe. Check `python -m benchmarks.bench_triage --from-cache` before raising it.
+TRIAGE_LOW_THRESHOLD = float(os.getenv("TRIAGE_LOW_THRESHOLD", "0"))
+TRIAGE_HIGH_THRESHOLD = float(os.getenv("TRIAGE_HIGH_THRESHOLD", "0.85"))
+
+# Overall assessment: "map_reduce" builds it from the clause analyses, "full_text" prompts
+# over the (truncated) document text
+ASSESSMENT_MODE = os.getenv("ASSESSMENT_MODE", "map_reduce")
+ASSESSMENT_REDUCE_WITH_LLM = os.getenv("ASSESSMENT_REDUCE_WITH_LLM", "1") == "1"
+ASSESSMENT_REDUCE_CLAUSES = 15  # riskiest clause summaries sent to the reduce prompt
+
+# Circuit breaker around the Gemini backend
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "60"))
+
 load_dotenv()
 
 # Helper for dynamic configuration
@@ -14,35 +56,143 @@ def _get_api_key():
         return os.getenv("GOOGLE_API_KEY")
 
 def _get_model():
-    """Tries multiple model variations to avoid 404 errors"""
-    variations = [
-        'gemini-2.0-flash', 
-        'gemini-2.5-flash',
-        'gemini-2.0-flash-exp', 
-        'gemini-1.5-flash', 
-        'gemini-pro'
-    ]
-    for v in variations:
-        try:
-            # Try with models/ prefix for stability
-            name = v if v.startswith('models/') else f"models/{v}"
-            m = genai.GenerativeModel(name)
-            return m
-        except:
-            continue
-    return genai.GenerativeModel('models/gemini-2.0-flash') # Ultimate fallback
+    """Working model for the current API key, resolved once per process by the shared registry."""
+    return get_model_registry().get(_get_api_key())
+
+def _cached_analysis(cache, clause_text, lang):
+    """
+    Clause cache lookup that needs neither an API key nor a reachable backend: the model already
+    resolved for the key if there is one, otherwise each known model in preference order.
+    """
+    if not cache:
+        return None
+    model = get_model_registry().peek(_get_api_key()) if _get_api_key() else None
+    if model is not None:
+        names = [getattr(model, "model_name", "unknown")]
+    else:
+        names = [v if v.startswith('models/') else f"models/{v}" for v in MODEL_VARIATIONS]
+    for name in names:
+        cached = cache.get(clause_text, lang, name, PROMPT_VERSION)
+        if cached:
+            return cached
+    return None
+
+class CircuitBreaker:
+    """
+    Stops calling Gemini after `threshold` consecutive failures so clauses go straight to the
+    heuristic engine instead of each waiting for its own error. After `cooldown` seconds one
+    half-open probe is let through: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = None
+        self.short_circuited = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a request may go out now; False means use the heuristic."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True  # exactly one probe while half-open
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in_seconds": retry_in,
+                "short_circuited": self.short_circuited,
+                "last_error": self.last_error,
+            }
+
+
+_breaker = CircuitBreaker()
+
+def _llm_allowed():
+    """
+    Gate in front of every Gemini call: no key or an open circuit means heuristic only.
+    A True result may be the half-open probe, so the caller must report the outcome
+    (`_on_llm_success` / `_on_llm_error`) on every path.
+    """
+    if not _get_api_key():
+        return False
+    return _breaker.allow()
 
-# Initial configuration
-genai.configure(api_key=_get_api_key())
+def _on_llm_success():
+    _breaker.record_success()
+
+def _on_llm_error(error):
+    """Bookkeeping for a failed Gemini call: trip the breaker, re-probe models after a model-not-found error."""
+    _breaker.record_failure(error)
+    if is_model_not_found(error):
+        get_model_registry().invalidate(_get_api_key())
+
+def get_backend_status():
+    """
+    State of the AI backend for status displays.
+    Returns:
+        dict: CircuitBreaker.snapshot() with 'state' set to 'no_key' when no API key is configured.
+    """
+    status = _breaker.snapshot()
+    if not _get_api_key():
+        status["state"] = "no_key"
+    return status
 
 def analyze_risk_with_llm(clause_text, lang="en"):
     """
     Analyzes a specific clause for risk using Google Gemini Pro.
     """
+    # Standard clauses repeat across contracts: serve them from the persistent cache,
+    # even while the backend is unavailable
+    cache = get_analysis_cache()
+    cached = _cached_analysis(cache, clause_text, lang)
+    if cached:
+        return cached
+
+    if not _llm_allowed():
+        return _heuristic_fallback(clause_text)
     try:
-        genai.configure(api_key=_get_api_key())
         model = _get_model()
-        
+    except Exception as e:
+        _on_llm_error(e)
+        return _heuristic_fallback(clause_text)
+
+    try:
+        model_name = getattr(model, "model_name", "unknown")
         language_instr = "IMPORTANT: Provide 'explanation' and 'suggestion' in HINDI." if lang == "hi" else "Provide 'explanation' and 'suggestion' in English."
         
         prompt = f"""
@@ -60,30 +210,186 @@ def analyze_risk_with_llm(clause_text, lang="en"):
         - "suggestion": (A safer alternative clause or negotiation trip)
         """
         
-        response = model.generate_content(prompt)
+        try:
+            response = get_llm_client().generate(model, prompt, len(prompt) // 4 + _OUTPUT_TOKENS_PER_CLAUSE, timeout=LLM_CALL_TIMEOUT_SECONDS, deadline=CLAUSE_DEADLINE_SECONDS)
+        except Exception as e:
+            _on_llm_error(e)
+            return _heuristic_fallback(clause_text)
+        _on_llm_success()
         
         # Clean response if it has backticks
         text_resp = response.text.replace('```json', '').replace('```', '').strip()
         
-        return json.loads(text_resp)
+        result = json.loads(text_resp)
+        if cache:
+            cache.put(clause_text, lang, model_name, PROMPT_VERSION, result)
+        return result
         
-    except Exception as e:
-        # Fallback to heuristic if API fails
+    except Exception:
+        # Fallback to heuristic if the response is unusable
         return _heuristic_fallback(clause_text)
 
-def _heuristic_fallback(clause_text):
+def estimate_clause_tokens(clause_text):
+    """Rough prompt+response token cost of one clause inside a batch (~4 chars/token)."""
+    return len(clause_text) // 4 + 1 + _OUTPUT_TOKENS_PER_CLAUSE
+
+def pack_batches(clause_texts, token_budget=BATCH_TOKEN_BUDGET, max_clauses=BATCH_MAX_CLAUSES):
+    """
+    Greedily packs clauses into batches that fit the token budget.
+    Returns:
+        list[list[int]]: Indices into `clause_texts`, in order.
+    """
+    batches, current, used = [], [], 0
+    for i, text in enumerate(clause_texts):
+        cost = estimate_clause_tokens(text)
+        if current and (used + cost > token_budget or len(current) >= max_clauses):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _parse_batch_response(text, ids):
+    """Maps clause id -> analysis for every well-formed item of the model's JSON array."""
+    data = json.loads(text.replace('```json', '').replace('```', '').strip())
+    if isinstance(data, dict):
+        data = data.get("results") or data.get("clauses") or []
+    parsed = {}
+    for item in data:
+        try:
+            cid = int(item["id"])
+            if cid in ids and cid not in parsed:
+                parsed[cid] = {
+                    "risk_score": int(item["risk_score"]),
+                    "explanation": item["explanation"],
+                    "red_flag": bool(item["red_flag"]),
+                    "suggestion": item["suggestion"],
+                }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parsed
+
+def _analyze_batch_once(model, clause_texts, ids, lang):
+    language_instr = "IMPORTANT: Provide 'explanation' and 'suggestion' in HINDI." if lang == "hi" else "Provide 'explanation' and 'suggestion' in English."
+    clauses_block = "\n\n".join(f'[{cid}] "{clause_texts[cid]}"' for cid in ids)
+
+    prompt = f"""
+    You are a Senior Legal Risk Auditor integrating Indian Law context.
+    Analyze EACH of the following contract clauses independently:
+
+    {clauses_block}
+
+    {language_instr}
+
+    Output stricly a Valid JSON array only (no markdown backticks), one object per clause, with keys:
+    - "id": (The clause number shown in brackets)
+    - "risk_score": (Integer 1-10, 10 being highest risk)
+    - "explanation": (A summary of what this means, max 2 sentences)
+    - "red_flag": (Boolean true/false if this is dangerous for an SME)
+    - "suggestion": (A safer alternative clause or negotiation trip)
+    """
+    tokens = len(prompt) // 4 + _OUTPUT_TOKENS_PER_CLAUSE * len(ids)
+    response = get_llm_client().generate(model, prompt, tokens, timeout=LLM_CALL_TIMEOUT_SECONDS, deadline=BATCH_DEADLINE_SECONDS)
+    return _parse_batch_response(response.text, set(ids))
+
+def analyze_risks_batch(clause_texts, lang="en", token_budget=BATCH_TOKEN_BUDGET, max_clauses=BATCH_MAX_CLAUSES):
+    """
+    Analyzes many clauses with few requests: clauses are packed into prompts sized to
+    `token_budget` and the model returns a JSON array of per-clause results.
+    Clauses missing or malformed in a response, or in a batch that failed outright, are packed
+    into one batched retry (after a `BATCH_RETRY_BACKOFF_SECONDS` pause if a request failed);
+    those still missing are then sent one per request, and fall back to the heuristic engine
+    if that fails too.
+    Returns:
+        list[dict]: Analyses aligned with `clause_texts`.
+    """
+    clause_texts = list(clause_texts)
+    if len(clause_texts) == 1:
+        return [analyze_risk_with_llm(clause_texts[0], lang=lang)]
+
+    results = [None] * len(clause_texts)
+    cache = get_analysis_cache()
+    pending = []
+    for i, text in enumerate(clause_texts):
+        results[i] = _cached_analysis(cache, text, lang)
+        if results[i] is None:
+            pending.append(i)
+    if not pending:
+        return results
+
+    permitted = _llm_allowed()
+    if not permitted:
+        return [r if r is not None else _heuristic_fallback(clause_texts[i]) for i, r in enumerate(results)]
+    try:
+        model = _get_model()
+    except Exception as e:
+        _on_llm_error(e)
+        return [r if r is not None else _heuristic_fallback(clause_texts[i]) for i, r in enumerate(results)]
+
+    try:
+        model_name = getattr(model, "model_name", "unknown")
+        failed = False
+        for _ in range(2):  # the batched pass and its one retry
+            if not pending:
+                break
+            if failed:
+                time.sleep(BATCH_RETRY_BACKOFF_SECONDS)
+                failed = False
+            for batch in pack_batches([clause_texts[i] for i in pending], token_budget, max_clauses):
+                ids = [pending[b] for b in batch]
+                if not (permitted or _breaker.allow()):
+                    continue  # circuit open: leave the batch to the heuristic
+                permitted = False
+                try:
+                    parsed = _analyze_batch_once(model, clause_texts, ids, lang)
+                except ValueError:
+                    _on_llm_success()  # the backend answered; only the JSON was bad
+                    continue
+                except Exception as e:
+                    _on_llm_error(e)
+                    failed = True
+                    continue  # whole batch failed; its items stay pending
+                _on_llm_success()
+                for cid, analysis in parsed.items():
+                    results[cid] = analysis
+                    if cache:
+                        cache.put(clause_texts[cid], lang, model_name, PROMPT_VERSION, analysis)
+            pending = [i for i in pending if results[i] is None]
+
+        if pending and failed:
+            time.sleep(2 * BATCH_RETRY_BACKOFF_SECONDS)
+        for i in pending:
+            # Single-clause requests; each falls back to the heuristic by itself
+            results[i] = analyze_risk_with_llm(clause_texts[i], lang=lang)
+    except Exception:
+        pass
+
+    return [r if r is not None else _heuristic_fallback(clause_texts[i]) for i, r in enumerate(results)]
+
+# Heuristic responses per keyword category, checked in order; the first category hit wins
+# and its rule weight becomes the risk score.
+HEURISTIC_RESPONSES = {
+    "indemnity": {"explanation": "Indemnity/Liability detected. High risk detected via heuristic analysis.", "red_flag": True, "suggestion": "Ensure there is a cap on liability."},
+    "termination": {"explanation": "Termination clause detected. Review notice periods.", "red_flag": False, "suggestion": "Seek mutual termination rights."},
+    "exclusivity": {"explanation": "Exclusivity or Non-compete detected. May limit business growth.", "red_flag": True, "suggestion": "Limit the duration and geography."},
+}
+
+def _heuristic_fallback(clause_text, hits=None):
     """
     Better backup logic if API fails, so it doesn't look 'static'.
+    The result is marked with 'source': 'heuristic' so callers can tell it from a model answer.
+    Args:
+        hits: Optional precomputed KeywordMatches for the clause.
     """
-    lower = clause_text.lower()
+    if hits is None:
+        hits = get_keyword_automaton().match(clause_text)
     
     # Dynamic logic based on keywords
-    if any(k in lower for k in ["indemnify", "indemnity", "limit of liability"]):
-        return {"risk_score": 8, "explanation": "Indemnity/Liability detected. High risk detected via heuristic analysis.", "red_flag": True, "suggestion": "Ensure there is a cap on liability."}
-    if any(k in lower for k in ["terminate", "termination", "cancellation"]):
-        return {"risk_score": 6, "explanation": "Termination clause detected. Review notice periods.", "red_flag": False, "suggestion": "Seek mutual termination rights."}
-    if any(k in lower for k in ["exclusive", "non-compete", "solicit"]):
-        return {"risk_score": 7, "explanation": "Exclusivity or Non-compete detected. May limit business growth.", "red_flag": True, "suggestion": "Limit the duration and geography."}
+    for category, response in HEURISTIC_RESPONSES.items():
+        if hits.counts.get(category):
+            return {"risk_score": int(hits.max_weight(category)), **response, "source": "heuristic"}
     
     # Base fallback
     complexity_score = min(4, len(clause_text) // 200) + 1
@@ -91,16 +397,150 @@ def _heuristic_fallback(clause_text):
         "risk_score": complexity_score, 
         "explanation": f"Standard clause of {len(clause_text)} chars. Base heuristic check passed.", 
         "red_flag": False, 
-        "suggestion": "Standard legal wording. Ensure alignment with business goals."
+        "suggestion": "Standard legal wording. Ensure alignment with business goals.",
+        "source": "heuristic",
     }
 
-def get_overall_assessment(full_text, lang="en"):
+TriageDecision = namedtuple("TriageDecision", ["risk", "confidence", "route", "analysis"])
+
+def estimate_clause_risk(clause_text, hits=None):
+    """
+    Heuristic probability that a clause is high risk, from the same keyword hits as
+    `_heuristic_fallback`. Several distinct red-flag terms push towards 1, keyword-free
+    boilerplate towards 0, and single or context-only terms land in the uncertain middle.
+    """
+    if hits is None:
+        hits = get_keyword_automaton().match(clause_text)
+
+    red = set()
+    clause_terms = set()
+    for category, response in HEURISTIC_RESPONSES.items():
+        clause_terms |= hits.keywords(category)
+        if response["red_flag"]:
+            red |= hits.keywords(category)
+    # Liability/dispute/breach wording that doesn't itself decide the heuristic category
+    context = len(hits.keywords("assessment") - clause_terms)
+
+    if red:
+        return min(0.97, 0.7 + 0.1 * (len(red) - 1) + 0.05 * context)
+    if hits.counts.get("termination"):
+        return min(0.8, 0.45 + 0.05 * context)
+    if context:
+        return min(0.6, 0.3 + 0.1 * context)
+    # No risk vocabulary at all; long clauses can still hide unusual terms
+    return min(0.3, 0.05 + len(clause_text) / 20000)
+
+def triage_clause(clause_text, lang="en", low=TRIAGE_LOW_THRESHOLD, high=TRIAGE_HIGH_THRESHOLD):
+    """
+    Decides whether a clause needs the LLM.
+    Returns:
+        TriageDecision: risk estimate (0-1), confidence (0-1), route ('local' or 'llm') and,
+        for local routes, the heuristic analysis to use.
+    """
+    if lang != "en":
+        # The keyword rules are English; other languages always go to the model
+        return TriageDecision(None, 0.0, "llm", None)
+    hits = get_keyword_automaton().match(clause_text)
+    risk = estimate_clause_risk(clause_text, hits)
+    confidence = abs(2 * risk - 1)
+    if risk <= low or risk >= high:
+        return TriageDecision(risk, confidence, "local", _heuristic_fallback(clause_text, hits))
+    return TriageDecision(risk, confidence, "llm", None)
+
+def clause_risk_score(record):
+    """
+    Risk score (1-10) of an analysed clause record. The LLM's JSON is not validated, so a
+    missing or non-numeric score ("High", null) falls back to the heuristic score of the clause.
+    """
+    try:
+        score = float(record["analysis"].get("risk_score"))
+        if not math.isnan(score):
+            return min(10.0, max(1.0, score))
+    except (TypeError, ValueError):
+        pass
+    return float(_heuristic_fallback(record.get("text", ""))["risk_score"])
+
+def aggregate_clause_results(clause_results):
+    """
+    Map step of the overall assessment: folds per-clause analyses into a document score
+    (100 = safe). The average risk, the five riskiest clauses and the red-flag count each
+    pull the score down, so one dangerous clause in a long contract is not averaged away.
+    Returns:
+        dict: {'overall_score', 'clauses', 'red_flags', 'average_risk'}
+    """
+    scores = sorted((clause_risk_score(r) for r in clause_results), reverse=True)
+    if not scores:
+        return {"overall_score": 100, "clauses": 0, "red_flags": 0, "average_risk": 0.0}
+    flags = sum(1 for r in clause_results if r["analysis"].get("red_flag"))
+    average = sum(scores) / len(scores)
+    top = scores[:5]
+    score = 100 - 3 * average - 3 * sum(top) / len(top) - min(30, 5 * flags)
+    return {
+        "overall_score": int(max(5, min(100, round(score)))),
+        "clauses": len(scores),
+        "red_flags": flags,
+        "average_risk": round(average, 1),
+    }
+
+def _clause_digest(record):
+    """One-line summary of an analysed clause for the reduce prompt."""
+    analysis = record["analysis"]
+    ref = record.get("number") or f"#{record.get('index', 0) + 1}"
+    flag = " RED FLAG" if analysis.get("red_flag") else ""
+    return f"[{ref}] risk {clause_risk_score(record):g}/10{flag}: {str(analysis.get('explanation', ''))[:200]}"
+
+def _assess_from_clauses(clause_results, lang="en"):
+    aggregate = aggregate_clause_results(clause_results)
+    # Copies of repeated clauses carry their representative's analysis; summarise each once
+    ranked = sorted(
+        (r for r in clause_results if r.get("duplicate_of") is None),
+        key=lambda r: (-clause_risk_score(r), not r["analysis"].get("red_flag"), r.get("index", 0))
+    )[:ASSESSMENT_REDUCE_CLAUSES]
+
+    summary = None
+    if ranked and ASSESSMENT_REDUCE_WITH_LLM and _llm_allowed():
+        language_instr = "IMPORTANT: Provide the 'summary' in HINDI." if lang == "hi" else "Provide the 'summary' in English."
+        digests = "\n".join(_clause_digest(r) for r in ranked)
+        prompt = f"""
+        Clause-by-clause review of a contract ({aggregate['clauses']} clauses, {aggregate['red_flags']} red flags, average risk {aggregate['average_risk']}/10).
+        The riskiest clauses were:
+        {digests}
+
+        Summarize the legal risks for an Indian Business Owner in 3 bullet points.
+        {language_instr}
+
+        Output JSON:
+        {{
+            "summary": "..."
+        }}
+        """
+        try:
+            response = get_llm_client().generate(_get_model(), prompt, timeout=LLM_CALL_TIMEOUT_SECONDS, deadline=CLAUSE_DEADLINE_SECONDS)
+            _on_llm_success()
+            summary = json.loads(response.text.replace('```json', '').replace('```', '').strip())["summary"]
+        except Exception as e:
+            if not isinstance(e, (ValueError, KeyError, TypeError)):
+                _on_llm_error(e)
+
+    if summary is None:
+        bullets = [f"- {aggregate['clauses']} clauses reviewed: {aggregate['red_flags']} red flags, average risk {aggregate['average_risk']}/10."]
+        bullets += [f"- {_clause_digest(r)}" for r in ranked[:2]]
+        summary = "\n".join(bullets)
+    return {"overall_score": aggregate["overall_score"], "summary": summary}
+
+def get_overall_assessment(full_text, lang="en", clause_results=None):
     """
     Generates a summary of the entire contract.
+    With `clause_results` (the pipeline's analysed clause records) and ASSESSMENT_MODE
+    'map_reduce', the score is aggregated from the clause analyses and only a short reduce
+    prompt over their summaries is sent, covering the whole contract instead of its first 10k chars.
     """
+    if clause_results and ASSESSMENT_MODE == "map_reduce":
+        return _assess_from_clauses(clause_results, lang)
+
     try:
-        genai.configure(api_key=_get_api_key())
-        model = _get_model()
+        if not _llm_allowed():
+            raise RuntimeError("AI backend unavailable (circuit open or no API key)")
         
         language_instr = "IMPORTANT: Provide the 'summary' in HINDI." if lang == "hi" else "Provide the 'summary' in English."
         
@@ -118,15 +558,19 @@ def get_overall_assessment(full_text, lang="en"):
             "summary": "..."
         }}
         """
-        response = model.generate_content(prompt)
+        try:
+            response = get_llm_client().generate(_get_model(), prompt, timeout=LLM_CALL_TIMEOUT_SECONDS, deadline=BATCH_DEADLINE_SECONDS)
+        except Exception as e:
+            _on_llm_error(e)
+            raise
+        _on_llm_success()
         text_resp = response.text.replace('```json', '').replace('```', '').strip()
         return json.loads(text_resp)
-    except:
+    except Exception:
         # Calculate a pseudo-random but deterministic score based on text length and keyword density
         # This makes different contracts show different scores even if AI is off.
         word_count = len(full_text.split())
-        risk_keywords = ["termination", "liability", "indemnity", "dispute", "court", "exclusive", "breach"]
-        keyword_hits = sum(1 for k in risk_keywords if k in full_text.lower())
+        keyword_hits = len(get_keyword_automaton().match(full_text).keywords("assessment"))
         
         dynamic_score = max(40, 90 - (keyword_hits * 5) - (word_count // 1000))
         
@@ -1,8 +1,12 @@
 import os
+import threading
 import pymongo
+from bson import ObjectId
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src.utils.repository import normalise_party
+
 load_dotenv()
 
 # MongoDB Config
@@ -11,69 +15,276 @@ MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = "risk_bot_db" 
 COLLECTION_NAME = "contracts"
 
+# One pooled client per process, health re-checked in the background
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_HEALTH_INTERVAL_SECONDS = float(os.getenv("MONGO_HEALTH_INTERVAL_SECONDS", "30"))
+MONGO_RECONNECT_AFTER_FAILURES = 3
+
 import certifi
 
-def get_db_connection():
-    if not MONGO_URI:
-        return None
-        
-    if "localhost" in MONGO_URI:
+_client = None
+_client_lock = threading.Lock()
+_monitor = None
+_monitor_lock = threading.Lock()
+_recheck = threading.Event()
+_health = {"healthy": None, "checked": None, "error": None, "failures": 0}
+
+def get_db_client():
+    """
+    Returns the process-wide MongoClient, created on first use (None if MongoDB is not configured).
+    pymongo pools connections inside the client, so every caller shares one set of TLS sessions.
+    """
+    global _client
+    if not MONGO_URI or "localhost" in MONGO_URI:
         return None
+    with _client_lock:
+        if _client is None:
+            # certifi.where() provides a reliable set of root certificates
+            # for SSL/TLS handshakes in cloud environments.
+            _client = pymongo.MongoClient(
+                MONGO_URI, 
+                serverSelectionTimeoutMS=10000, 
+                tls=True, 
+                tlsCAFile=certifi.where(),
+                maxPoolSize=MONGO_MAX_POOL_SIZE
+            )
+        return _client
 
+def _check_health():
+    """Pings the server and records the result; rebuilds the client after repeated failures."""
+    global _client
+    client = get_db_client()
+    if client is None:
+        return False
     try:
-        # certifi.where() provides a reliable set of root certificates
-        # for SSL/TLS handshakes in cloud environments.
-        client = pymongo.MongoClient(
-            MONGO_URI, 
-            serverSelectionTimeoutMS=10000, 
-            tls=True, 
-            tlsCAFile=certifi.where()
-        ) 
-        # Quick ping to check connection
         client.admin.command('ping')
-        db = client[DB_NAME]
-        return db[COLLECTION_NAME]
+        error = None
     except Exception as e:
+        error = e
         print(f"MongoDB Connection Error: {e}")
+
+    stale = None
+    with _client_lock:
+        _health["healthy"] = error is None
+        _health["checked"] = datetime.now()
+        _health["error"] = str(error) if error else None
+        _health["failures"] = 0 if error is None else _health["failures"] + 1
+        if _health["failures"] >= MONGO_RECONNECT_AFTER_FAILURES and _client is client:
+            # Reconnect from scratch (fresh DNS/SRV lookup and pool) on the next use
+            stale, _client = _client, None
+            _health["failures"] = 0
+    if stale is not None:
+        stale.close()
+    return error is None
+
+def _monitor_loop():
+    while True:
+        _recheck.wait(MONGO_HEALTH_INTERVAL_SECONDS)
+        _recheck.clear()
+        _check_health()
+
+def _ensure_monitor():
+    """Starts the background health thread; the very first check runs inline so the status is known."""
+    global _monitor
+    if _monitor is not None:
+        return
+    with _monitor_lock:
+        if _monitor is None:
+            _check_health()
+            _monitor = threading.Thread(target=_monitor_loop, name="mongo-health", daemon=True)
+            _monitor.start()
+
+def request_health_check():
+    """Asks the background thread to re-ping now, e.g. after a failed operation."""
+    _recheck.set()
+
+def get_db_status():
+    """
+    Cached connection health, without any network round trip.
+    Returns:
+        dict: {'configured', 'healthy', 'checked', 'error'}
+    """
+    if get_db_client() is None:
+        return {"configured": False, "healthy": False, "checked": None, "error": None}
+    _ensure_monitor()
+    with _client_lock:
+        return {"configured": True, "healthy": bool(_health["healthy"]), "checked": _health["checked"], "error": _health["error"]}
+
+# Identity of a stored analysis: same bytes, same prompt, same language
+ANALYSIS_KEY_FIELDS = ("content_hash", "prompt_version", "language")
+
+# Indexes behind the history, lookup and filter queries, provisioned by `init_db.py`.
+# History is sorted on (upload_date, _id), so fields are ordered equality, sort, range: the party
+# index leads with its equality match, and the score range trails the sort keys so score-filtered
+# pages walk the sort index and check the score on its keys instead of sorting in memory.
+CONTRACT_INDEXES = [
+    {
+        "keys": [(field, pymongo.ASCENDING) for field in ANALYSIS_KEY_FIELDS],
+        "name": "content_hash_prompt_language",
+        "unique": True,
+        # Documents saved before hashing existed have no content_hash
+        "partialFilterExpression": {"content_hash": {"$type": "string"}},
+    },
+    {
+        "keys": [("upload_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING), ("risk_overall_score", pymongo.ASCENDING)],
+        "name": "upload_date_id_risk_score",
+    },
+    {
+        "keys": [("parties", pymongo.ASCENDING), ("upload_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)],
+        "name": "parties_upload_date",
+    },
+]
+# Earlier index layouts, superseded by the ones above
+OBSOLETE_INDEXES = ("upload_date_id", "risk_score_upload_date")
+_indexed_collections = set()
+
+def ensure_indexes(collection, indexes=CONTRACT_INDEXES):
+    """
+    Creates the given indexes (a no-op for those that already exist).
+    Returns:
+        list: Names of the indexes that could not be created.
+    """
+    failed = []
+    for spec in indexes:
+        options = {k: v for k, v in spec.items() if k != "keys"}
+        try:
+            collection.create_index(spec["keys"], **options)
+        except Exception as e:
+            print(f"Error creating index {spec['name']}: {e}")
+            failed.append(spec["name"])
+    return failed
+
+def _ensure_content_index(collection):
+    """
+    Creates the unique analysis-identity index once per process; the upserts rely on it.
+    The history indexes are left to `init_db.py` so the app never builds them on a hot path.
+    """
+    if collection.name in _indexed_collections:
+        return
+    _indexed_collections.add(collection.name)  # attempted once per process, successful or not
+    ensure_indexes(collection, CONTRACT_INDEXES[:1])
+
+def get_db_connection(collection_name=COLLECTION_NAME):
+    """
+    Returns the contracts collection (or `collection_name`) on the shared client, or None when
+    MongoDB is not configured or the last health check failed. No network round trip on the hot path.
+    """
+    client = get_db_client()
+    if client is None:
+        return None
+    _ensure_monitor()
+    if not _health["healthy"]:
         return None
+    collection = client[DB_NAME][collection_name]
+    _ensure_content_index(collection)
+    return collection
+
+HISTORY_FIELDS = {"filename": 1, "upload_date": 1, "risk_overall_score": 1, "clauses_analyzed_count": 1, "entities.PARTIES": 1, "language": 1}
 
-def save_contract_analysis(filename, text, entities, risk_analysis, overall_assessment):
+def encode_history_cursor(document):
+    """Opaque page cursor: the (upload_date, _id) position of the last document on a page."""
+    return f"{document['upload_date'].isoformat()}_{document['_id']}"
+
+def decode_history_cursor(cursor):
+    upload_date, _, oid = cursor.rpartition("_")
+    if not ObjectId.is_valid(oid):
+        raise ValueError(f"bad document id {oid!r}")
+    return datetime.fromisoformat(upload_date), ObjectId(oid)
+
+def _history_query(min_score=None, max_score=None, start_date=None, end_date=None, party=None, cursor=None):
+    clauses = []
+    score = {}
+    if min_score is not None:
+        score["$gte"] = min_score
+    if max_score is not None:
+        score["$lte"] = max_score
+    if score:
+        clauses.append({"risk_overall_score": score})
+    dates = {}
+    if start_date is not None:
+        dates["$gte"] = start_date
+    if end_date is not None:
+        dates["$lt"] = end_date
+    if dates:
+        clauses.append({"upload_date": dates})
+    if party:
+        clauses.append({"parties": normalise_party(party)})
+    if cursor:
+        # Keyset pagination: strictly after the last (upload_date, _id) of the previous page
+        last_date, last_id = decode_history_cursor(cursor)
+        clauses.append({"$or": [
+            {"upload_date": {"$lt": last_date}},
+            {"upload_date": last_date, "_id": {"$lt": last_id}},
+        ]})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def get_contract_history(limit=20, cursor=None, min_score=None, max_score=None,
+                         start_date=None, end_date=None, party=None, collection_name=COLLECTION_NAME):
     """
-    Saves the contract analysis result to MongoDB.
+    One page of analysed contracts, newest first.
+    Pages are keyed on (upload_date, _id) rather than skip/offset, so every page costs the same
+    index walk however deep it is, and saves made meanwhile don't shift later pages.
+    Args:
+        limit: Page size.
+        cursor: `next_cursor` of the previous page (None for the first page).
+        min_score, max_score: Inclusive overall risk score range.
+        start_date, end_date: Upload date range (datetime, end exclusive).
+        party: Party name, matched case-insensitively against the extracted parties.
+    Returns:
+        (list, str): The page's documents (summary fields only) and the cursor of the next page,
+        or None when this is the last one.
     """
-    collection = get_db_connection()
+    collection = get_db_connection(collection_name)
     if collection is None:
-        return False
-
-    document = {
-        "filename": filename,
-        "upload_date": datetime.now(),
-        "entities": entities,
-        "risk_overall_score": overall_assessment.get('overall_score'),
-        "risk_summary": overall_assessment.get('summary'),
-        "clauses_analyzed_count": len(risk_analysis),
-        "full_analysis": risk_analysis, # Storing the full JSON analysis
-        # "raw_text": text # Optional: might be too large, uncomment if needed
-    }
+        return [], None
 
     try:
-        result = collection.insert_one(document)
-        return str(result.inserted_id)
+        query = _history_query(min_score, max_score, start_date, end_date, party, cursor)
+        documents = list(
+            collection.find(query, HISTORY_FIELDS)
+            .sort([("upload_date", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+            .limit(limit + 1)
+        )
+    except ValueError as e:
+        print(f"Invalid history cursor: {e}")
+        return [], None
     except Exception as e:
-        print(f"Error saving to DB: {e}")
-        return False
+        print(f"Error fetching history: {e}")
+        request_health_check()
+        return [], None
+
+    # One extra document tells us whether another page exists
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, encode_history_cursor(documents[-1])
+    return documents, None
 
 def get_recent_contracts(limit=5):
     """
     Retrieves the last N contracts analyzed.
     """
-    collection = get_db_connection()
+    documents, _ = get_contract_history(limit=limit)
+    return documents
+
+def find_analysis_by_hash(content_hash, prompt_version, language=None, collection_name=COLLECTION_NAME):
+    """
+    Looks up a stored analysis of an identical document (same content hash and prompt version,
+    and language when given) so it can be replayed instead of re-analysed.
+    Returns:
+        dict: The stored document (without raw text), or None.
+    """
+    collection = get_db_connection(collection_name)
     if collection is None:
-        return []
-    
+        return None
+
+    query = {"content_hash": content_hash, "prompt_version": prompt_version}
+    if language is not None:
+        query["language"] = language
     try:
-        cursor = collection.find({}, {"filename": 1, "upload_date": 1, "risk_overall_score": 1}).sort("upload_date", -1).limit(limit)
-        return list(cursor)
+        return collection.find_one(query, sort=[("upload_date", -1)])
     except Exception as e:
-        print(f"Error fetching history: {e}")
-        return []
+        print(f"Error looking up analysis: {e}")
+        request_health_check()
+        return None
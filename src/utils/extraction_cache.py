@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Bump whenever the stored fields or the extraction/NLP output they hold change shape,
+# so stale entries are treated as misses instead of being served.
+CACHE_FORMAT_VERSION = 2
+
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(".cache", "extraction"))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+def content_hash(data):
+    """SHA-256 hex digest of the uploaded bytes (independent of the filename)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """
+    On-disk, content-addressed cache of extraction results.
+    One JSON file per document, named by its SHA-256. File mtime doubles as
+    the LRU clock: hits touch the file, eviction removes the oldest first.
+    """
+
+    def __init__(self, directory=EXTRACTION_CACHE_DIR, max_bytes=EXTRACTION_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, digest):
+        """
+        Returns the cached record (text, language, entities) or None on a miss.
+        """
+        path = self._path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if record.get("version") != CACHE_FORMAT_VERSION:
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)  # mark as most recently used
+        except OSError:
+            pass
+        return record
+
+    def put(self, digest, text, language, entities):
+        """
+        Stores an extraction result and evicts least-recently-used entries over the size cap.
+        """
+        record = {
+            "version": CACHE_FORMAT_VERSION,
+            "sha256": digest,
+            "created": time.time(),
+            "text": text,
+            "language": language,
+            "entities": entities,
+        }
+        path = self._path(digest)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp, path)  # atomic, readers never see a partial file
+        except OSError as e:
+            print(f"Extraction cache write error: {e}")
+            self._remove(tmp)
+            return False
+
+        self._evict()
+        return True
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+                total += st.st_size
+
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(os.path.join(self.directory, name))
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Returns the process-wide extraction cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
@@ -1,44 +1,259 @@
+import os
+import time
+import tempfile
+import threading
+import zipfile
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 import PyPDF2
 import pdfplumber
-import docx
 from io import BytesIO
 
-def extract_text_from_file(uploaded_file):
+# Parallel PDF extraction config
+# Small documents are cheaper to parse in-process than to hand to the pool.
+PARALLEL_MIN_PAGES = 8
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """Lazily creates the process-wide PDF extraction pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn' avoids forking the (multi-threaded) Streamlit server process.
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _iter_page_range(path, start, end):
     """
-    Extracts text from PDF, DOCX, or TXT file.
+    Yields pages [start, end) of the PDF at `path` as dicts with 'page', 'text', 'engine' and 'seconds'.
+    Pages pdfplumber cannot parse are retried individually with PyPDF2.
+    """
+    reader = None
+
+    def fallback(i):
+        nonlocal reader
+        t0 = time.perf_counter()
+        try:
+            if reader is None:
+                reader = PyPDF2.PdfReader(path)
+            extracted = reader.pages[i].extract_text() or ""
+            engine = "PyPDF2"
+        except Exception:
+            extracted = ""
+            engine = "failed"
+        return {"page": i + 1, "text": extracted, "engine": engine, "seconds": time.perf_counter() - t0}
+
+    try:
+        pdf = pdfplumber.open(path)
+    except Exception:
+        # pdfplumber could not open the document at all
+        for i in range(start, end):
+            yield fallback(i)
+        return
+
+    with pdf:
+        for i in range(start, end):
+            t0 = time.perf_counter()
+            try:
+                extracted = pdf.pages[i].extract_text() or ""
+            except Exception:
+                yield fallback(i)
+                continue
+            yield {"page": i + 1, "text": extracted, "engine": "pdfplumber", "seconds": time.perf_counter() - t0}
+
+
+def _extract_page_range(path, start, end):
+    """Pool task: extracts pages [start, end). Runs in a worker, so it re-opens the file itself."""
+    return list(_iter_page_range(path, start, end))
+
+
+def _count_pdf_pages(path):
+    try:
+        with pdfplumber.open(path) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        return len(PyPDF2.PdfReader(path).pages)
+
+
+def _page_ranges(page_count, workers):
+    """
+    Splits pages into contiguous ranges, ~2 per worker so stragglers even out.
+    The first page gets a range of its own so streaming consumers see text after one page of work.
+    """
+    if page_count <= 1:
+        return [(0, page_count)]
+    rest = page_count - 1
+    chunks = max(1, min(rest, workers * 2))
+    size = -(-rest // chunks)
+    return [(0, 1)] + [(s, min(s + size, page_count)) for s in range(1, page_count, size)]
+
+
+def iter_pdf_pages(data, parallel=True, executor=None, workers=None):
+    """
+    Extracts a PDF page by page, spreading page ranges across a process pool.
+    Pages are yielded in document order as soon as their range is parsed.
     Args:
-        uploaded_file: Streamlit UploadedFile object.
+        data: Raw PDF bytes.
+        parallel: Set False to parse in the calling process.
+        executor: Optional executor to use instead of the shared pool (e.g. for benchmarks).
+        workers: Number of workers in `executor`, used to size the page ranges (default PDF_WORKERS,
+            the size of the shared pool).
+    Yields:
+        dict: Page with 'page', 'text', 'engine' and 'seconds'.
+    """
+    # Workers open the document by path, so only a short string is pickled per task.
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(data)
+        path = tmp.name
+
+    futures = []
+    try:
+        page_count = _count_pdf_pages(path)
+        if not parallel or page_count < PARALLEL_MIN_PAGES:
+            yield from _iter_page_range(path, 0, page_count)
+            return
+
+        pool = executor or _get_process_pool()
+        ranges = _page_ranges(page_count, workers or PDF_WORKERS)
+        futures = [pool.submit(_extract_page_range, path, s, e) for s, e in ranges]
+
+        for f in futures:  # submission order == page order
+            yield from f.result()
+    finally:
+        for f in futures:
+            f.cancel()
+        os.unlink(path)
+
+
+def extract_pdf_pages(data, parallel=True, executor=None, workers=None):
+    """
+    Extracts a whole PDF; see `iter_pdf_pages`.
     Returns:
-        str: Extracted text.
+        list[dict]: Pages in document order with 'page', 'text', 'engine' and 'seconds'.
+    """
+    return list(iter_pdf_pages(data, parallel=parallel, executor=executor, workers=workers))
+
+
+def summarize_page_timings(pages):
+    """
+    Summarises per-page extraction timings returned by `extract_pdf_pages`.
+    """
+    if not pages:
+        return {"pages": 0, "total_seconds": 0.0, "mean_seconds": 0.0, "slowest": [], "fallback_pages": []}
+    total = sum(p["seconds"] for p in pages)
+    slowest = sorted(pages, key=lambda p: p["seconds"], reverse=True)[:5]
+    return {
+        "pages": len(pages),
+        "total_seconds": total,
+        "mean_seconds": total / len(pages),
+        "slowest": [(p["page"], p["seconds"]) for p in slowest],
+        "fallback_pages": [p["page"] for p in pages if p["engine"] != "pdfplumber"],
+    }
+
+
+# WordprocessingML tags used by the streaming DOCX reader
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_TC, _W_T, _W_TAB, _W_BR, _W_CR = (
+    _W + "body", _W + "p", _W + "tc", _W + "t", _W + "tab", _W + "br", _W + "cr"
+)
+
+
+def iter_docx_blocks(source):
+    """
+    Streams a DOCX document without building the python-docx object model.
+    Iterparses word/document.xml straight from the zip and discards each block once read,
+    so memory stays bounded by the largest single paragraph/cell, not the file size.
+    Args:
+        source: Path or binary file-like object of the .docx.
+    Yields:
+        tuple: (kind, text) in document order, kind being 'paragraph' or 'cell'.
+    """
+    with zipfile.ZipFile(source) as zf, zf.open("word/document.xml") as xml:
+        body = None
+        cells = []   # stack of open table cells (tables can nest)
+        runs = []    # text fragments of the current paragraph
+
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == _W_BODY:
+                    body = elem
+                elif tag == _W_TC:
+                    cells.append([])
+                continue
+
+            if tag == _W_T:
+                runs.append(elem.text or "")
+            elif tag == _W_TAB:
+                runs.append("\t")
+            elif tag in (_W_BR, _W_CR):
+                runs.append("\n")
+            elif tag == _W_P:
+                text = "".join(runs)
+                runs = []
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield ("paragraph", text)
+            elif tag == _W_TC:
+                text = " ".join(t for t in cells.pop() if t.strip())
+                if cells:
+                    cells[-1].append(text)  # nested table: fold into the outer cell
+                else:
+                    yield ("cell", text)
+
+            if tag in (_W_P, _W_TC):
+                elem.clear()
+            if body is not None and len(body) and not cells and tag != _W_BODY:
+                # Top-level block finished: drop the processed children from the tree
+                if elem is body[-1]:
+                    body.clear()
+
+
+def iter_text_from_file(uploaded_file, parallel=True):
+    """
+    Streaming counterpart of `extract_text_from_file`.
+    Yields text chunks (a PDF page, a DOCX paragraph/cell, or the whole TXT) as soon as
+    they are parsed; joined together they equal `extract_text_from_file`'s result.
+    A file that cannot be read raises where parsing failed, possibly after some chunks,
+    so partial text is never mistaken for the whole document.
     """
     file_type = uploaded_file.name.split('.')[-1].lower()
-    text = ""
 
+    if file_type == 'pdf':
+        uploaded_file.seek(0)
+        for page in iter_pdf_pages(uploaded_file.read(), parallel=parallel):
+            if page["text"]:
+                yield page["text"] + "\n"
+
+    elif file_type in ['docx', 'doc']:
+        uploaded_file.seek(0)
+        for _, block in iter_docx_blocks(uploaded_file):
+            yield block + "\n"
+
+    elif file_type == 'txt':
+        yield uploaded_file.getvalue().decode("utf-8")
+
+
+def extract_text_from_file(uploaded_file, parallel=True):
+    """
+    Extracts text from PDF, DOCX, or TXT file.
+    Args:
+        uploaded_file: Streamlit UploadedFile object.
+        parallel: Use the page-parallel PDF engine for large PDFs.
+    Returns:
+        str: Extracted text, or an "Error reading file: ..." message if the file can't be read.
+    """
     try:
-        if file_type == 'pdf':
-            # Try pdfplumber first for better extraction
-            try:
-                with pdfplumber.open(uploaded_file) as pdf:
-                    for page in pdf.pages:
-                        extracted = page.extract_text()
-                        if extracted:
-                            text += extracted + "\n"
-            except Exception as e:
-                # Fallback to PyPDF2
-                uploaded_file.seek(0)
-                reader = PyPDF2.PdfReader(uploaded_file)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-        
-        elif file_type in ['docx', 'doc']:
-            doc = docx.Document(uploaded_file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-                
-        elif file_type == 'txt':
-            text = uploaded_file.getvalue().decode("utf-8")
-            
+        return "".join(iter_text_from_file(uploaded_file, parallel=parallel))
     except Exception as e:
         return f"Error reading file: {str(e)}"
-
-    return text
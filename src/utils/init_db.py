@@ -2,6 +2,23 @@ import os
 import pymongo
 from dotenv import load_dotenv
 
+from src.utils.db_handler import CONTRACT_INDEXES, OBSOLETE_INDEXES, ensure_indexes
+from src.utils.repository import normalise_party
+
+def backfill_parties(collection, batch_size=500):
+    """Adds the indexed `parties` field to documents saved before it existed."""
+    updated = 0
+    batch = []
+    for doc in collection.find({"parties": {"$exists": False}}, {"entities.PARTIES": 1}):
+        parties = sorted({normalise_party(p) for p in (doc.get("entities") or {}).get("PARTIES", [])})
+        batch.append(pymongo.UpdateOne({"_id": doc["_id"]}, {"$set": {"parties": parties}}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
 def init_mongo():
     load_dotenv()
     uri = os.getenv("MONGO_URI")
@@ -28,6 +45,22 @@ def init_mongo():
             # Create explicitly (optional in Mongo, but good for confirmation)
             db.create_collection(col_name)
             print(f"✅ Collection '{col_name}' created successfully.")
+
+        collection = db[col_name]
+        filled = backfill_parties(collection)
+        if filled:
+            print(f"✅ Added party names to {filled} older analyses.")
+
+        # Indexes for history paging, hash lookups and the score/party filters
+        failed = ensure_indexes(collection)
+        for spec in CONTRACT_INDEXES:
+            if spec["name"] not in failed:
+                print(f"✅ Index '{spec['name']}' ready.")
+        existing = collection.index_information()
+        for name in OBSOLETE_INDEXES:
+            if name in existing:
+                collection.drop_index(name)
+                print(f"🗑️  Dropped superseded index '{name}'.")
             
         print("\nDatabase setup complete. Data will be stored in 'risk_bot_db.contracts'.")
         
@@ -0,0 +1,300 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+
+# "mongo", "sqlite", or "auto": MongoDB when a remote MONGO_URI is configured, else SQLite
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "auto").lower()
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(".cache", "contracts.sqlite3"))
+
+# Overall score bands, as drawn on the dashboard gauge: (name, lower bound, upper bound exclusive)
+SCORE_BANDS = (("high_risk", 0, 50), ("moderate", 50, 80), ("low_risk", 80, 101))
+
+
+def normalise_party(name):
+    """Case- and whitespace-insensitive form of a party name, as stored in `parties`."""
+    return " ".join(str(name).split()).casefold()
+
+
+def build_contract_document(filename, entities, risk_analysis, overall_assessment,
+                            content_hash=None, language=None, prompt_version=None):
+    """The stored form of one analysed contract (without an id; each backend assigns its own)."""
+    document = {
+        "content_hash": content_hash,
+        "prompt_version": prompt_version,
+        "language": language,
+        "filename": filename,
+        "upload_date": datetime.now(),
+        "entities": entities,
+        # Indexed copy of the party names for the history filter
+        "parties": sorted({normalise_party(p) for p in (entities or {}).get("PARTIES", [])}),
+        "risk_overall_score": overall_assessment.get('overall_score'),
+        "risk_summary": overall_assessment.get('summary'),
+        "clauses_analyzed_count": len(risk_analysis),
+        "full_analysis": risk_analysis, # Storing the full JSON analysis
+        # "raw_text": text # Optional: might be too large, uncomment if needed
+    }
+    if content_hash is None:
+        for field in ("content_hash", "prompt_version", "language"):
+            document.pop(field)
+    return document
+
+
+class ContractRepository(ABC):
+    """
+    Storage of analysed contracts. Every backend returns documents in the same shape (the
+    fields of `build_contract_document` plus '_id'), pages history newest first with an opaque
+    cursor, and treats (content_hash, prompt_version, language) as the identity of an analysis:
+    saving the same identity again replaces the stored one and keeps its id.
+    """
+
+    backend = None
+
+    @abstractmethod
+    def save(self, filename, text, entities, risk_analysis, overall_assessment,
+             content_hash=None, language=None, prompt_version=None):
+        """
+        Stores an analysis. Returns its id as a string, or False if storage is unavailable.
+        Backends that write in the background return before the write lands; `flush` confirms it.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def history(self, limit=20, cursor=None, min_score=None, max_score=None,
+                start_date=None, end_date=None, party=None):
+        """
+        One page of analysed contracts, newest first, with summary fields only.
+        Args:
+            cursor: `next_cursor` of the previous page (None for the first page).
+            min_score, max_score: Inclusive overall risk score range.
+            start_date, end_date: Upload date range (datetime, end exclusive).
+            party: Party name, matched case-insensitively against the extracted parties.
+        Returns:
+            (list, str): The page's documents and the next page's cursor (None on the last page).
+        """
+        raise NotImplementedError
+
+    def recent(self, limit=5):
+        """The last N contracts analysed."""
+        documents, _ = self.history(limit=limit)
+        return documents
+
+    @abstractmethod
+    def find_by_hash(self, content_hash, prompt_version, language=None):
+        """The stored analysis of an identical document (language optional), or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def analytics(self, start_date=None, end_date=None, top_parties=10):
+        """
+        Portfolio statistics over the contracts uploaded in [start_date, end_date).
+        Returns:
+            dict: 'contracts', 'avg_score', 'min_score', 'max_score', 'clauses_analyzed',
+            'score_bands' (count per SCORE_BANDS name), 'languages' (count per language,
+            'unknown' when none was recorded) and 'top_parties' ([(party, contracts)], most
+            frequent first).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def status(self):
+        """
+        Returns:
+            dict: {'backend', 'configured', 'healthy', 'checked', 'error'}, without a network round trip.
+        """
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        """
+        Waits until earlier saves are visible to reads. Returns False on timeout, or if a save
+        could not be written (a backend with a retry journal may still write it later).
+        """
+        return True
+
+    def close(self):
+        pass
+
+
+def _empty_analytics():
+    return {
+        "contracts": 0, "avg_score": None, "min_score": None, "max_score": None, "clauses_analyzed": 0,
+        "score_bands": {name: 0 for name, _, _ in SCORE_BANDS}, "languages": {}, "top_parties": [],
+    }
+
+
+class MongoContractRepository(ContractRepository):
+    """
+    MongoDB Atlas storage on the shared pooled client (see `db_handler`). Saves go through the
+    write-behind queue, so they become readable shortly after `save` returns (see `flush`).
+    """
+
+    backend = "mongo"
+    # Identities saved by this process -> their id, so a replace queued before the first save
+    # is written still returns the id the upsert keeps
+    ASSIGNED_IDS_MAX = 1024
+
+    def __init__(self, collection_name=None):
+        from src.utils import db_handler
+        self.collection_name = collection_name or db_handler.COLLECTION_NAME
+        self._queue = None
+        self._assigned = OrderedDict()
+        self._assigned_lock = threading.Lock()
+
+    def _db(self):
+        from src.utils import db_handler
+        return db_handler
+
+    def _write_queue(self):
+        db_handler = self._db()
+        if self._queue is None:
+            from src.utils.write_queue import WriteBehindQueue, WRITE_JOURNAL_PATH, get_write_queue
+            if self.collection_name == db_handler.COLLECTION_NAME:
+                self._queue = get_write_queue()
+            else:
+                root, ext = os.path.splitext(WRITE_JOURNAL_PATH)
+                self._queue = WriteBehindQueue(
+                    lambda: db_handler.get_db_connection(self.collection_name),
+                    journal_path=f"{root}.{self.collection_name}{ext}",
+                    upsert_keys=db_handler.ANALYSIS_KEY_FIELDS
+                )
+        return self._queue
+
+    def save(self, filename, text, entities, risk_analysis, overall_assessment,
+             content_hash=None, language=None, prompt_version=None):
+        db_handler = self._db()
+        if db_handler.get_db_client() is None:
+            return False
+        document = build_contract_document(filename, entities, risk_analysis, overall_assessment,
+                                           content_hash, language, prompt_version)
+        document = {"_id": self._document_id(document), **document}
+        self._write_queue().put(document)
+        return str(document["_id"])
+
+    def _document_id(self, document):
+        # A replaced analysis keeps its stored id (the upsert only sets _id on insert)
+        from bson import ObjectId
+        if document.get("content_hash") is None:
+            return ObjectId()
+        identity = tuple(document.get(k) for k in self._db().ANALYSIS_KEY_FIELDS)
+        with self._assigned_lock:
+            document_id = self._assigned.get(identity)
+        if document_id is None:
+            collection = self._db().get_db_connection(self.collection_name)
+            try:
+                stored = collection.find_one(dict(zip(self._db().ANALYSIS_KEY_FIELDS, identity)), {"_id": 1}) \
+                    if collection is not None else None
+            except Exception as e:
+                print(f"Error looking up stored analysis: {e}")
+                stored = None
+            document_id = stored["_id"] if stored else ObjectId()
+        with self._assigned_lock:
+            self._assigned[identity] = document_id
+            self._assigned.move_to_end(identity)
+            if len(self._assigned) > self.ASSIGNED_IDS_MAX:
+                self._assigned.popitem(last=False)
+        return document_id
+
+    def history(self, limit=20, cursor=None, min_score=None, max_score=None,
+                start_date=None, end_date=None, party=None):
+        return self._db().get_contract_history(limit, cursor, min_score, max_score, start_date, end_date,
+                                               party, collection_name=self.collection_name)
+
+    def find_by_hash(self, content_hash, prompt_version, language=None):
+        return self._db().find_analysis_by_hash(content_hash, prompt_version, language,
+                                                collection_name=self.collection_name)
+
+    def analytics(self, start_date=None, end_date=None, top_parties=10):
+        db_handler = self._db()
+        collection = db_handler.get_db_connection(self.collection_name)
+        if collection is None:
+            return _empty_analytics()
+
+        dates = {}
+        if start_date is not None:
+            dates["$gte"] = start_date
+        if end_date is not None:
+            dates["$lt"] = end_date
+        pipeline = [
+            {"$match": {"upload_date": dates} if dates else {}},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "contracts": {"$sum": 1},
+                    "avg_score": {"$avg": "$risk_overall_score"},
+                    "min_score": {"$min": "$risk_overall_score"},
+                    "max_score": {"$max": "$risk_overall_score"},
+                    "clauses_analyzed": {"$sum": "$clauses_analyzed_count"},
+                }}],
+                "bands": [
+                    {"$match": {"risk_overall_score": {"$type": "number"}}},
+                    {"$bucket": {
+                        "groupBy": "$risk_overall_score",
+                        "boundaries": [lo for _, lo, _ in SCORE_BANDS] + [SCORE_BANDS[-1][2]],
+                        "default": "other",
+                    }},
+                ],
+                "languages": [{"$group": {"_id": "$language", "count": {"$sum": 1}}}],
+                "parties": [
+                    {"$unwind": "$parties"},
+                    {"$group": {"_id": "$parties", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": top_parties},
+                ],
+            }},
+        ]
+        try:
+            facets = next(collection.aggregate(pipeline))
+        except Exception as e:
+            print(f"Error computing analytics: {e}")
+            db_handler.request_health_check()
+            return _empty_analytics()
+
+        result = _empty_analytics()
+        if facets["totals"]:
+            totals = facets["totals"][0]
+            result.update({k: totals[k] for k in ("contracts", "avg_score", "min_score", "max_score", "clauses_analyzed")})
+        bounds = {lo: name for name, lo, _ in SCORE_BANDS}
+        for bucket in facets["bands"]:
+            if bucket["_id"] in bounds:
+                result["score_bands"][bounds[bucket["_id"]]] = bucket["count"]
+        result["languages"] = {row["_id"] or "unknown": row["count"] for row in facets["languages"]}
+        result["top_parties"] = [(row["_id"], row["count"]) for row in facets["parties"]]
+        return result
+
+    def status(self):
+        return {"backend": self.backend, **self._db().get_db_status()}
+
+    def flush(self, timeout=None):
+        if self._db().get_db_client() is None:
+            return True
+        return self._write_queue().flush(timeout)
+
+
+def _configured_backend():
+    if STORAGE_BACKEND in ("mongo", "sqlite"):
+        return STORAGE_BACKEND
+    uri = os.getenv("MONGO_URI")
+    # db_handler only connects to remote (TLS) deployments; anything else is served locally
+    return "mongo" if uri and "localhost" not in uri else "sqlite"
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_contract_repository():
+    """Returns the process-wide contract repository for the configured STORAGE_BACKEND."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            if _configured_backend() == "sqlite":
+                import sqlite3
+                from src.utils.sqlite_repository import SQLiteContractRepository
+                try:
+                    _repository = SQLiteContractRepository(SQLITE_DB_PATH)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Local contract store unavailable: {e}")
+            if _repository is None:
+                _repository = MongoContractRepository()
+        return _repository
@@ -0,0 +1,287 @@
+import os
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.utils.repository import ContractRepository, SCORE_BANDS, SQLITE_DB_PATH, build_contract_document, normalise_party
+
+_SUMMARY_COLUMNS = "id, content_hash, language, filename, upload_date, risk_overall_score, clauses_analyzed_count, entities"
+_ALL_COLUMNS = ("id, content_hash, prompt_version, language, filename, upload_date, risk_overall_score, "
+                "clauses_analyzed_count, entities, risk_summary, full_analysis")
+# Idle read connections kept open; busier moments open extra ones and close them afterwards
+SQLITE_READERS = int(os.getenv("SQLITE_READERS", "4"))
+
+
+def _timestamp(value):
+    # Fixed-width ISO text sorts in date order, so the upload_date index serves ranges and paging
+    return value.isoformat(timespec="microseconds")
+
+
+class SQLiteContractRepository(ContractRepository):
+    """
+    Embedded contract store for offline and on-prem deployments: one SQLite file in WAL mode.
+    Saves go through one write connection; reads use a small pool of read-only connections,
+    so in WAL mode they see the last committed data instead of waiting for a save in progress.
+    Party names live in a side table keyed by party for the history filter and the party analytics.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path=SQLITE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        # An in-memory database exists only on its own connection
+        self._shared = path == ":memory:" or path.startswith("file::memory:")
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; saves open their own IMMEDIATE transaction so concurrent processes serialise
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contracts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT,
+                prompt_version TEXT,
+                language TEXT,
+                filename TEXT,
+                upload_date TEXT NOT NULL,
+                risk_overall_score NUMERIC,
+                clauses_analyzed_count INTEGER NOT NULL DEFAULT 0,
+                entities TEXT,
+                risk_summary TEXT,
+                full_analysis TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_contracts_identity
+                ON contracts(content_hash, prompt_version, language) WHERE content_hash IS NOT NULL;
+            -- Sort keys first, score last: score-filtered pages walk this index in order
+            -- and test the score on its entries instead of sorting the matches
+            DROP INDEX IF EXISTS idx_contracts_upload_date;
+            DROP INDEX IF EXISTS idx_contracts_score;
+            CREATE INDEX IF NOT EXISTS idx_contracts_upload_date_score ON contracts(upload_date, id, risk_overall_score);
+            CREATE TABLE IF NOT EXISTS contract_parties (
+                party TEXT NOT NULL,
+                contract_id INTEGER NOT NULL REFERENCES contracts(id) ON DELETE CASCADE,
+                PRIMARY KEY (party, contract_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_contract_parties_contract ON contract_parties(contract_id);
+        """)
+
+    @contextmanager
+    def _reading(self):
+        """A connection for reads: a pooled reader, or the write connection for in-memory stores."""
+        if self._shared:
+            with self._lock:
+                yield self._conn
+            return
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.execute("PRAGMA query_only=ON")
+        try:
+            # One snapshot for every query of the call, like the reads under the write lock had
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            if self._readers.qsize() < SQLITE_READERS:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def _document(self, row, columns):
+        document = {}
+        for name, value in zip(columns, row):
+            if value is None and name in ("content_hash", "prompt_version", "language"):
+                continue  # absent for analyses saved without a content hash, as in MongoDB
+            if name == "id":
+                document["_id"] = str(value)
+            elif name == "upload_date":
+                document[name] = datetime.fromisoformat(value)
+            elif name in ("entities", "full_analysis"):
+                document[name] = json.loads(value) if value is not None else None
+            else:
+                document[name] = value
+        return document
+
+    def save(self, filename, text, entities, risk_analysis, overall_assessment,
+             content_hash=None, language=None, prompt_version=None):
+        document = build_contract_document(filename, entities, risk_analysis, overall_assessment,
+                                           content_hash, language, prompt_version)
+        values = (
+            document["filename"], _timestamp(document["upload_date"]), document["risk_overall_score"],
+            document["clauses_analyzed_count"], json.dumps(document["entities"], ensure_ascii=False, default=str),
+            document["risk_summary"], json.dumps(document["full_analysis"], ensure_ascii=False, default=str),
+        )
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                existing = None
+                if content_hash is not None:
+                    existing = self._conn.execute(
+                        "SELECT id FROM contracts WHERE content_hash = ? AND prompt_version IS ? AND language IS ?",
+                        (content_hash, prompt_version, language)
+                    ).fetchone()
+                if existing:
+                    # Same document, prompt and language: replace the analysis, keep the id
+                    contract_id = existing[0]
+                    self._conn.execute("""
+                        UPDATE contracts SET filename = ?, upload_date = ?, risk_overall_score = ?,
+                            clauses_analyzed_count = ?, entities = ?, risk_summary = ?, full_analysis = ?
+                        WHERE id = ?
+                    """, values + (contract_id,))
+                    self._conn.execute("DELETE FROM contract_parties WHERE contract_id = ?", (contract_id,))
+                else:
+                    contract_id = self._conn.execute("""
+                        INSERT INTO contracts (content_hash, prompt_version, language, filename, upload_date,
+                            risk_overall_score, clauses_analyzed_count, entities, risk_summary, full_analysis)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (content_hash, prompt_version, language) + values).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO contract_parties (party, contract_id) VALUES (?, ?)",
+                    [(party, contract_id) for party in document["parties"]]
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                print(f"Error saving to local store: {e}")
+                return False
+        return str(contract_id)
+
+    def history(self, limit=20, cursor=None, min_score=None, max_score=None,
+                start_date=None, end_date=None, party=None):
+        conditions, params = [], []
+        if min_score is not None:
+            conditions.append("risk_overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("risk_overall_score <= ?")
+            params.append(max_score)
+        if start_date is not None:
+            conditions.append("upload_date >= ?")
+            params.append(_timestamp(start_date))
+        if end_date is not None:
+            conditions.append("upload_date < ?")
+            params.append(_timestamp(end_date))
+        if party:
+            conditions.append("id IN (SELECT contract_id FROM contract_parties WHERE party = ?)")
+            params.append(normalise_party(party))
+        if cursor:
+            # Keyset pagination: strictly after the last (upload_date, id) of the previous page
+            upload_date, _, contract_id = cursor.rpartition("_")
+            try:
+                params.extend([_timestamp(datetime.fromisoformat(upload_date)), int(contract_id)])
+            except ValueError as e:
+                print(f"Invalid history cursor: {e}")
+                return [], None
+            conditions.append("(upload_date, id) < (?, ?)")
+
+        query = f"SELECT {_SUMMARY_COLUMNS} FROM contracts"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY upload_date DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        try:
+            with self._reading() as conn:
+                rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error fetching history: {e}")
+            return [], None
+
+        columns = [c.strip() for c in _SUMMARY_COLUMNS.split(",")]
+        documents = []
+        for row in rows[:limit]:
+            document = self._document(row, columns)
+            document.pop("content_hash", None)
+            document["entities"] = {"PARTIES": (document["entities"] or {}).get("PARTIES", [])}
+            documents.append(document)
+        # One extra row tells us whether another page exists
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            return documents, f"{last[4]}_{last[0]}"
+        return documents, None
+
+    def find_by_hash(self, content_hash, prompt_version, language=None):
+        query = f"SELECT {_ALL_COLUMNS} FROM contracts WHERE content_hash = ? AND prompt_version IS ?"
+        params = [content_hash, prompt_version]
+        if language is not None:
+            query += " AND language = ?"
+            params.append(language)
+        query += " ORDER BY upload_date DESC LIMIT 1"
+        try:
+            with self._reading() as conn:
+                row = conn.execute(query, params).fetchone()
+                parties = [r[0] for r in conn.execute(
+                    "SELECT party FROM contract_parties WHERE contract_id = ? ORDER BY party", (row[0],))] if row else []
+        except sqlite3.Error as e:
+            print(f"Error looking up analysis: {e}")
+            return None
+        if row is None:
+            return None
+        document = self._document(row, [c.strip() for c in _ALL_COLUMNS.split(",")])
+        document["parties"] = parties
+        return document
+
+    def analytics(self, start_date=None, end_date=None, top_parties=10):
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append("c.upload_date >= ?")
+            params.append(_timestamp(start_date))
+        if end_date is not None:
+            conditions.append("c.upload_date < ?")
+            params.append(_timestamp(end_date))
+        where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+        bands = ", ".join(
+            f"SUM(CASE WHEN c.risk_overall_score >= {lo} AND c.risk_overall_score < {hi} THEN 1 ELSE 0 END)"
+            for _, lo, hi in SCORE_BANDS
+        )
+        try:
+            with self._reading() as conn:
+                totals = conn.execute(f"""
+                    SELECT COUNT(*), AVG(c.risk_overall_score), MIN(c.risk_overall_score), MAX(c.risk_overall_score),
+                        COALESCE(SUM(c.clauses_analyzed_count), 0), {bands}
+                    FROM contracts c{where}
+                """, params).fetchone()
+                languages = conn.execute(
+                    f"SELECT COALESCE(c.language, 'unknown'), COUNT(*) FROM contracts c{where} GROUP BY 1", params
+                ).fetchall()
+                parties = conn.execute(f"""
+                    SELECT p.party, COUNT(*) AS n FROM contract_parties p JOIN contracts c ON c.id = p.contract_id{where}
+                    GROUP BY p.party ORDER BY n DESC, p.party LIMIT ?
+                """, params + [top_parties]).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error computing analytics: {e}")
+            totals, languages, parties = (0, None, None, None, 0) + (0,) * len(SCORE_BANDS), [], []
+
+        return {
+            "contracts": totals[0],
+            "avg_score": totals[1],
+            "min_score": totals[2],
+            "max_score": totals[3],
+            "clauses_analyzed": totals[4],
+            "score_bands": {name: count or 0 for (name, _, _), count in zip(SCORE_BANDS, totals[5:])},
+            "languages": dict(languages),
+            "top_parties": [tuple(row) for row in parties],
+        }
+
+    def status(self):
+        return {"backend": self.backend, "configured": True, "healthy": True, "checked": None, "error": None}
+
+    def close(self):
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,295 @@
+import os
+import time
+import queue
+import atexit
+import threading
+
+from bson import json_util
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+WRITE_QUEUE_MAX = int(os.getenv("WRITE_QUEUE_MAX", "1000"))
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "50"))
+WRITE_FLUSH_SECONDS = float(os.getenv("WRITE_FLUSH_SECONDS", "1.0"))
+WRITE_MAX_RETRIES = 3
+WRITE_RETRY_BASE_SECONDS = 0.5
+WRITE_JOURNAL_PATH = os.getenv("WRITE_JOURNAL_PATH", os.path.join(".cache", "pending_writes.jsonl"))
+# How often the writer tries to replay the journal while idle
+WRITE_REPLAY_INTERVAL_SECONDS = 30.0
+
+_DUPLICATE_KEY = 11000
+
+
+def _is_transient(error):
+    if isinstance(error, ConnectionFailure):
+        return True
+    has_label = getattr(error, "has_error_label", None)
+    return bool(has_label and has_label("RetryableWriteError"))
+
+
+class WriteBehindQueue:
+    """
+    Background writer for contract documents.
+    `put` never blocks: documents go to a bounded in-memory queue that one daemon thread
+    drains into `bulk_write` batches (flushed at `batch_size` documents or `flush_seconds`
+    after the first one). Documents that have every `upsert_keys` field replace the stored
+    document with the same key (keeping its `_id`); the rest are plain inserts. Transient errors are retried with backoff; documents that still
+    cannot be written - or that arrive while the queue is full - are appended to a JSONL
+    journal, which is replayed once the database is reachable again. Documents carry their
+    own `_id`, so a replayed or retried insert is idempotent. Journal lines that cannot be
+    parsed (e.g. a write cut short by a crash) are moved to a `.corrupt` file instead of
+    blocking the replay. `flush` reports whether documents were journaled or lost instead of
+    written, so callers don't present a save as stored while it is only pending.
+    """
+
+    def __init__(self, get_collection, journal_path=WRITE_JOURNAL_PATH, max_size=WRITE_QUEUE_MAX,
+                 batch_size=WRITE_BATCH_SIZE, flush_seconds=WRITE_FLUSH_SECONDS, upsert_keys=()):
+        self.get_collection = get_collection
+        self.upsert_keys = tuple(upsert_keys)
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_size)
+        self._journal_lock = threading.Lock()
+        self._stop = object()
+        self._last_replay = 0.0
+
+        # Counters
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.last_error = None
+        self._unsaved = 0  # journaled or dropped since the last flush
+        self._unsaved_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, document):
+        """Queues a document for writing; spills it to the journal if the queue is full."""
+        if not self._thread.is_alive():
+            self._spill([document])
+            return
+        try:
+            self._queue.put_nowait(document)
+        except queue.Full:
+            self._spill([document])
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued document has been written or journaled.
+        Returns:
+            bool: True if all of them reached the database; False on timeout, or if any document
+            was journaled (to be retried later) or dropped since the previous flush.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        with self._unsaved_lock:
+            unsaved, self._unsaved = self._unsaved, 0
+        return unsaved == 0
+
+    def close(self, timeout=10.0):
+        """Stops the writer after draining the queue (anything left unwritten is journaled)."""
+        if not self._thread.is_alive():
+            # The writer is gone; don't lose what it never picked up
+            self._drain_on_stop()
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            # The writer is stuck behind a full queue (e.g. retrying a slow database):
+            # journal what it hasn't picked up yet, then ask it to stop
+            self._spill(self._take_queued())
+            try:
+                self._queue.put_nowait(self._stop)
+            except queue.Full:
+                return  # still being refilled; the daemon thread ends with the process
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+            "journal_pending": self._journal_exists(),
+        }
+
+    # --- writer thread ---
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                try:
+                    self._maybe_replay()
+                except Exception as e:
+                    print(f"Error replaying pending writes: {e}")
+                continue
+
+            batch, stopping = [], first is self._stop
+            if not stopping:
+                batch.append(first)
+            deadline = time.monotonic() + self.flush_seconds
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception as e:
+                print(f"Error saving to DB: {e}")
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+            if stopping:
+                self._drain_on_stop()
+                return
+
+    def _take_queued(self):
+        """Removes and returns every document still in the queue."""
+        taken = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return taken
+            if item is not self._stop:
+                taken.append(item)
+            self._queue.task_done()
+
+    def _drain_on_stop(self):
+        leftovers = self._take_queued()
+        if leftovers:
+            self._write(leftovers)
+
+    def _request(self, document):
+        if self.upsert_keys and all(document.get(k) is not None for k in self.upsert_keys):
+            fields = {k: v for k, v in document.items() if k != "_id"}
+            return UpdateOne(
+                {k: document[k] for k in self.upsert_keys},
+                {"$set": fields, "$setOnInsert": {"_id": document["_id"]}},
+                upsert=True
+            )
+        return InsertOne(document)
+
+    def _insert(self, collection, documents):
+        """Unordered bulk write that treats already-present keys (earlier partial writes) as success."""
+        try:
+            collection.bulk_write([self._request(doc) for doc in documents], ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != _DUPLICATE_KEY for err in errors) or e.details.get("writeConcernErrors"):
+                raise
+
+    def _write(self, documents):
+        for attempt in range(WRITE_MAX_RETRIES + 1):
+            collection = self.get_collection()
+            if collection is None:
+                break
+            try:
+                self._insert(collection, documents)
+                self.written += len(documents)
+                self.batches += 1
+                return True
+            except Exception as e:
+                if not _is_transient(e) or attempt == WRITE_MAX_RETRIES:
+                    print(f"Error saving to DB: {e}")
+                    self.last_error = str(e)
+                    break
+                self.retries += 1
+                time.sleep(WRITE_RETRY_BASE_SECONDS * 2 ** attempt)
+        self._spill(documents)
+        return False
+
+    # --- journal ---
+
+    def _journal_exists(self):
+        return os.path.exists(self.journal_path) or os.path.exists(self.journal_path + ".replaying")
+
+    def _spill(self, documents):
+        if not documents:
+            return True
+        with self._unsaved_lock:
+            self._unsaved += len(documents)
+        try:
+            with self._journal_lock:
+                if os.path.dirname(self.journal_path):
+                    os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    for doc in documents:
+                        f.write(json_util.dumps(doc) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error journaling {len(documents)} unsaved analyses: {e}")
+            self.last_error = str(e)
+            self.dropped += len(documents)
+            return False
+        self.spilled += len(documents)
+        return True
+
+    def _maybe_replay(self):
+        now = time.monotonic()
+        if now - self._last_replay < WRITE_REPLAY_INTERVAL_SECONDS or not self._journal_exists():
+            return
+        self._last_replay = now
+        if self.get_collection() is None:
+            return
+
+        # Take the journal over atomically; failures are spilled to a fresh one. A leftover
+        # .replaying file (interrupted replay) is finished first.
+        replaying = self.journal_path + ".replaying"
+        with self._journal_lock:
+            if not os.path.exists(replaying):
+                os.replace(self.journal_path, replaying)
+        documents, corrupt = [], []
+        with open(replaying, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    documents.append(json_util.loads(line))
+                except ValueError:
+                    corrupt.append(line if line.endswith("\n") else line + "\n")
+        if corrupt:
+            print(f"Skipping {len(corrupt)} unreadable journal lines (kept in {self.journal_path}.corrupt)")
+            with open(self.journal_path + ".corrupt", "a", encoding="utf-8") as f:
+                f.writelines(corrupt)
+        for start in range(0, len(documents), self.batch_size):
+            chunk = documents[start:start + self.batch_size]
+            if self._write(chunk):
+                self.replayed += len(chunk)
+        os.remove(replaying)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_write_queue():
+    """Returns the process-wide write-behind queue for the contracts collection."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            from src.utils.db_handler import get_db_connection, ANALYSIS_KEY_FIELDS
+            _writer = WriteBehindQueue(get_db_connection, upsert_keys=ANALYSIS_KEY_FIELDS)
+            atexit.register(_writer.close)
+        return _writer
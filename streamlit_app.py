@@ -14,11 +14,13 @@ from dotenv import load_dotenv
 
 # Try importing from src
 try:
-    from src.utils.file_handler import extract_text_from_file
-    from src.logic.nlp_processor import extract_entities, split_into_clauses, detect_language
-    from src.logic.risk_engine import analyze_risk_with_llm, get_overall_assessment
+    from src.utils.file_handler import iter_text_from_file, extract_text_from_file
+    from src.logic.nlp_processor import extract_entities, iter_clauses, detect_language
+    from src.logic.pipeline import iter_analyzed_clauses, api_calls_saved, triaged_locally, coverage, llm_answered
+    from src.logic.risk_engine import get_overall_assessment, PROMPT_VERSION
     from src.utils.pdf_generator import generate_pdf_report
-    from src.utils.db_handler import save_contract_analysis, get_recent_contracts
+    from src.utils.repository import get_contract_repository
+    from src.utils.extraction_cache import content_hash, get_extraction_cache
 except ImportError as e:
     st.error(f"Import Error: {e}. Please check your file structure.")
     st.stop()
@@ -163,6 +165,13 @@ def draw_risk_gauge(score):
     fig.update_layout(height=250, margin=dict(l=20, r=20, t=50, b=20), paper_bgcolor="rgba(0,0,0,0)")
     return fig
 
+# Sidebar history is re-read at most this often instead of on every rerun
+RECENT_SCANS_TTL_SECONDS = 15
+
+@st.cache_data(ttl=RECENT_SCANS_TTL_SECONDS, show_spinner=False)
+def load_recent_scans(limit=3):
+    return get_contract_repository().recent(limit=limit)
+
 # --- Main App ---
 def main():
     # --- PREMIUM UI SYSTEM (Maximum Streamlit Potential) ---
@@ -542,21 +551,42 @@ def main():
         # API Status Indicator
         if 'api_key' not in st.session_state:
             st.session_state.api_key = os.getenv("GOOGLE_API_KEY", "")
-            if st.session_state.api_key:
-                import google.generativeai as genai
-                genai.configure(api_key=st.session_state.api_key)
 
-        if not st.session_state.api_key:
+        from src.logic.risk_engine import get_backend_status
+        backend = get_backend_status()
+        if backend["state"] == "no_key":
             st.sidebar.error("🔴 AI Backend: Offline")
+        elif backend["state"] == "open":
+            st.sidebar.warning(f"🟠 AI Backend: Unavailable • heuristic mode, retry in {backend['retry_in_seconds']:.0f}s")
+        elif backend["state"] == "half_open":
+            st.sidebar.warning("🟡 AI Backend: Reconnecting")
         else:
             st.sidebar.success("🟢 AI Backend: Connected")
         
-        # Database Status
-        from src.utils.db_handler import get_db_connection
-        if get_db_connection() is not None:
+        # Database Status (cached by the background health check; no round trip per rerun)
+        db_status = get_contract_repository().status()
+        if db_status["healthy"] and db_status["backend"] == "sqlite":
+            st.sidebar.success("🟢 Database: Local (SQLite)")
+        elif db_status["healthy"]:
             st.sidebar.success("🟢 Database: Connected")
+        elif db_status["configured"]:
+            st.sidebar.warning("🟡 Database: Reconnecting - History Unavailable")
         else:
             st.sidebar.warning("🟡 Database: History Unavailable")
+
+        # Clause analysis cache
+        from src.logic.analysis_cache import get_analysis_cache
+        clause_cache = get_analysis_cache()
+        if clause_cache:
+            cs = clause_cache.stats()
+            st.sidebar.caption(f"⚡ Clause cache: {cs['entries']} entries • {cs['hit_rate']:.0%} hit rate")
+
+        # Shared LLM request queue (all sessions)
+        from src.logic.llm_client import get_llm_client
+        ls = get_llm_client().stats()
+        st.sidebar.caption(f"📨 LLM queue: {ls['queue_depth']} waiting • {ls['in_flight']} in flight • avg wait {ls['avg_wait_seconds']:.1f}s")
+        for model_name, lat in ls['latency'].items():
+            st.sidebar.caption(f"⏱️ {model_name.replace('models/', '')}: p50 {lat['p50']:.1f}s • p95 {lat['p95']:.1f}s • p99 {lat['p99']:.1f}s ({lat['count']} calls)")
         
         # Add spacing
         st.markdown("<div style='margin-bottom: 0.5rem;'></div>", unsafe_allow_html=True)
@@ -590,7 +620,7 @@ def main():
         # Recent Scans Section
         st.markdown("**RECENT SCANS**")
         st.markdown("<div style='margin: 0.75rem 0;'></div>", unsafe_allow_html=True)
-        history = get_recent_contracts(limit=3)
+        history = load_recent_scans(limit=3)
         if history:
             for h in history:
                 # Truncate filename
@@ -634,6 +664,10 @@ def main():
                 
                 # The Uploader
                 uploaded_file = st.file_uploader("Drop contract here", type=["pdf", "docx", "txt"], label_visibility="collapsed")
+                # Toggling re-processes the current file
+                st.checkbox("🔄 Force fresh analysis", key="force_fresh",
+                            help="Ignore any stored analysis of this exact document and run the AI again.",
+                            on_change=lambda: st.session_state.pop('last_uploaded', None))
                 
                 if uploaded_file:
                     # Logic to process
@@ -671,7 +705,9 @@ def main():
                         st.metric("Risk Score", st.session_state['assessment']['overall_score'], delta="AI Calculated")
                 with s2:
                      with st.container(border=True):
-                         st.metric("Clauses Scanned", len(st.session_state['analyzed_clauses']))
+                         scanned = st.session_state['analyzed_clauses']
+                         covered = coverage(scanned)
+                         st.metric("Clauses Scanned", f"{covered} of {len(scanned)}", delta="Full coverage" if covered == len(scanned) else "Budget reached", delta_color="normal" if covered == len(scanned) else "off")
                 with s3:
                      with st.container(border=True):
                          risks = sum(1 for c in st.session_state['analyzed_clauses'] if c['analysis']['red_flag'])
@@ -681,6 +717,8 @@ def main():
         if st.session_state.get('analysis_done'):
              
              st.markdown("### 📊 Analysis Report")
+             if st.session_state.get('save_warning'):
+                 st.warning(st.session_state['save_warning'])
              
              with st.container(border=True):
                  c_chart, c_text = st.columns([1, 2])
@@ -720,35 +758,131 @@ def main():
                      else:
                          st.success("No major red flags detected.")
 
-        # Processing Logic (High-Speed Parallel execution)
+        # Processing Logic (Incremental: clauses are analysed as their pages are parsed)
         if uploaded_file and ('last_uploaded' not in st.session_state or st.session_state.last_uploaded != uploaded_file.name):
-            from concurrent.futures import ThreadPoolExecutor
-            
             with st.status("🔮 Parallel AI Scanning...", expanded=True) as status:
-                st.write("📂 Extracting document text...")
-                raw_text = extract_text_from_file(uploaded_file)
-                st.session_state['raw_text'] = raw_text
-                
-                st.write("🌐 Detecting language and entities...")
-                lang = detect_language(raw_text)
+                # Identical bytes (re-upload, refresh, renamed file) skip parsing entirely
+                digest = content_hash(uploaded_file.getvalue())
+                cache = get_extraction_cache()
+                cached = cache.get(digest)
+
+                # An identical document analysed before (same prompt version and language) is replayed
+                prior = None
+                if not st.session_state.get('force_fresh'):
+                    prior = get_contract_repository().find_by_hash(digest, PROMPT_VERSION, cached['language'] if cached else None)
+                if prior:
+                    st.write("⚡ Identical document analysed before - loading stored results...")
+                    raw_text = cached['text'] if cached else extract_text_from_file(uploaded_file)
+                    st.session_state['raw_text'] = raw_text
+                    st.session_state['language'] = prior.get('language') or (cached['language'] if cached else detect_language(raw_text))
+                    st.session_state['analyzed_clauses'] = prior.get('full_analysis', [])
+                    st.session_state['entities'] = prior.get('entities') or extract_entities(raw_text)
+                    st.session_state['assessment'] = {"overall_score": prior.get('risk_overall_score'), "summary": prior.get('risk_summary')}
+                    st.session_state['dedup_calls_saved'] = 0
+                    st.session_state['save_warning'] = None
+                    st.session_state['analysis_done'] = True
+                    st.session_state['last_uploaded'] = uploaded_file.name
+                    status.update(label="✅ Loaded previous analysis!", state="complete", expanded=False)
+                    st.rerun()
+
+                pages = []
+                # A read error mid-document ends the text there; what came before is still analysed
+                read_errors = []
+                if cached:
+                    st.write("⚡ Loaded extracted text from cache...")
+                    lang = cached['language']
+                    pages.append(cached['text'])
+                    chunks = iter(pages)
+                else:
+                    st.write("📂 Extracting document text...")
+                    chunks = iter_text_from_file(uploaded_file)
+                    try:
+                        first = next(chunks, "")
+                    except Exception as e:
+                        read_errors.append(e)
+                        first = ""
+                    pages.append(first)
+                    # Provisional language from the opening page; clauses are also routed individually
+                    lang = detect_language(first)
+
+                    def _collect(source):
+                        yield first
+                        try:
+                            for chunk in source:
+                                pages.append(chunk)
+                                yield chunk
+                        except Exception as e:
+                            read_errors.append(e)
+                    chunks = _collect(chunks)
                 st.session_state['language'] = lang
-                entities = extract_entities(raw_text)
+
+                st.write("📊 Analyzing clauses as pages arrive...")
+                st.session_state['analysis_done'] = False
+                st.session_state['analyzed_clauses'] = []
+                live_metrics = st.empty()
+                live_feed = st.container()
+
+                # Every clause is scheduled, riskiest first, within the per-document time/token budget
+                results = []
+                progress = {}
+                for record in iter_analyzed_clauses(iter_clauses(chunks), lang=lang, max_workers=6, progress=progress):
+                    results.append(record)
+                    st.session_state['analyzed_clauses'] = sorted(results, key=lambda r: r['index'])
+                    flags = sum(1 for r in results if r['analysis']['red_flag'])
+                    total = f"{progress['total']}" if progress.get('complete') else f"{progress.get('total', 0)}+"
+                    live_metrics.markdown(f"Analysed **{coverage(results)} of {total}** clauses • **{flags}** critical flags • **{api_calls_saved(results)}** duplicate calls saved • **{triaged_locally(results)}** resolved locally")
+                    with live_feed:
+                        risk = record['analysis']['risk_score']
+                        badge = f":red[**{risk}/10**]" if risk > 7 else f":green[**{risk}/10**]"
+                        st.markdown(f"{badge} {record['text'][:140]}...")
+
+                saved = api_calls_saved(results)
+                if saved:
+                    st.write(f"♻️ Reused analyses for {saved} repeated clauses ({saved} API calls saved).")
+                st.session_state['dedup_calls_saved'] = saved
+                skipped = len(results) - coverage(results)
+                if skipped:
+                    st.write(f"⏱️ Analysis budget reached: {skipped} lower-priority clauses scored by the local heuristics only.")
+                local = triaged_locally(results)
+                if local:
+                    st.write(f"🧮 Resolved {local} clear-cut clauses locally (heuristics / trained classifier); only ambiguous ones sent to AI.")
+
+                if read_errors:
+                    st.warning(f"⚠️ Error reading file: {read_errors[0]} - only the text extracted before the error was analysed.")
+                raw_text = "".join(pages)
+                st.session_state['raw_text'] = raw_text
+                if not cached:
+                    # Settle the document language over a sample of all pages
+                    lang = detect_language(raw_text)
+                    st.session_state['language'] = lang
+                results = st.session_state['analyzed_clauses']
+
+                st.write("🌐 Extracting entities...")
+                entities = cached['entities'] if cached else extract_entities(raw_text)
                 st.session_state['entities'] = entities
-                
-                st.write("📊 Analyzing clauses in parallel...")
-                clauses = split_into_clauses(raw_text)[:12] # Core clauses
-                
-                # Execute in parallel to save time
-                with ThreadPoolExecutor(max_workers=6) as executor:
-                    results = list(executor.map(lambda c: {"text": c, "analysis": analyze_risk_with_llm(c, lang=lang)}, clauses))
-                
-                st.session_state['analyzed_clauses'] = results
-                
+                if not cached and not read_errors:
+                    cache.put(digest, raw_text, lang, entities)
+
                 st.write("📝 Finalizing overall assessment...")
-                assessment = get_overall_assessment(raw_text, lang=lang)
+                assessment = get_overall_assessment(raw_text, lang=lang, clause_results=results)
                 st.session_state['assessment'] = assessment
                 
-                save_contract_analysis(uploaded_file.name, raw_text, entities, results, assessment)
+                # Only a complete, AI-reviewed analysis is stored under the document's hash for replay;
+                # otherwise it is kept in history but the next upload of these bytes is analysed again
+                replayable = not read_errors and llm_answered(results) > 0
+                if not replayable:
+                    st.write("ℹ️ Saved to history without replay: the next upload of this file will be analysed again.")
+                repository = get_contract_repository()
+                saved_id = repository.save(uploaded_file.name, raw_text, entities, results, assessment,
+                                           content_hash=digest if replayable else None,
+                                           language=lang, prompt_version=PROMPT_VERSION)
+                # Saves may be written in the background; only report what the database confirmed
+                if not saved_id:
+                    st.session_state['save_warning'] = "⚠️ Not saved to history: storage is not configured or unavailable."
+                elif not repository.flush(timeout=10):
+                    st.session_state['save_warning'] = "⚠️ Not saved to history yet: the database did not confirm the write. It will be retried if possible."
+                else:
+                    st.session_state['save_warning'] = None
                 st.session_state['analysis_done'] = True
                 st.session_state['last_uploaded'] = uploaded_file.name
                 status.update(label="✅ Analysis Complete!", state="complete", expanded=False)
@@ -778,13 +912,17 @@ def main():
         
         st.write("Explore individual clauses with 'Explain Like I'm 5' simplification.")
         
-        if st.session_state.get('analysis_done'):
+        if st.session_state.get('analyzed_clauses'):
+            if not st.session_state.get('analysis_done'):
+                st.info(f"⏳ Analysis in progress - showing {len(st.session_state['analyzed_clauses'])} clauses analysed so far.")
             for idx, item in enumerate(st.session_state['analyzed_clauses']):
                 with st.container():
                      # Card-like styling using columns
                      c1, c2 = st.columns(2)
                      with c1:
                          st.markdown("**📜 Legal Text**")
+                         if item.get('path'):
+                             st.caption(" › ".join(item['path']))
                          st.info(item['text'])
                      with c2:
                          st.markdown("**🤖 AI Explanation**")
@@ -875,50 +1013,41 @@ def main():
         if prompt := st.chat_input("Message the Assistant...", key="dialog_chat_v4"):
             st.session_state.chat_history.append({"role": "user", "content": prompt})
             try:
-                import google.generativeai as genai
-                genai.configure(api_key=st.session_state.get('api_key', ''))
-                
-                # Use cached model if available to save time
-                if 'working_model' not in st.session_state:
-                    st.session_state.working_model = None
-                
-                model_found = False
-                test_models = ['gemini-2.0-flash', 'gemini-2.5-flash', 'gemini-2.0-flash-exp', 'gemini-1.5-flash', 'gemini-pro']
-                
-                # Reorder list to try working model first
-                if st.session_state.working_model:
-                    test_models.insert(0, st.session_state.working_model)
+                from src.logic.model_registry import get_model_registry, is_model_not_found
+                from src.logic.llm_client import get_llm_client
+                api_key = st.session_state.get('api_key', '')
+
+                ctx = st.session_state.get('raw_text', '')[:12000]
 
-                for mname in test_models:
+                # Enhanced Solution-Oriented Prompt with Language Support
+                detected_lang = st.session_state.get('language', 'en')
+                lang_instr = "IMPORTANT: Provide all answers and solutions in HINDI." if detected_lang == "hi" else "Provide all answers in English."
+
+                system_instr = f"""
+                You are a Senior Legal Strategist. Your goal is to provide actionable solutions.
+                {lang_instr}
+                1. Answer questions based on the CONTRACT CONTEXT provided.
+                2. If the user asks for suggestions or 'what to do', provide strategic advice and negotiation tips.
+                3. Be proactive: if you see a high risk, suggest a safer alternative.
+                4. Provide clear, professional, and step-by-step solutions.
+                """
+                full_prompt = f"{system_instr}\n\nCONTRACT CONTEXT:\n{ctx}\n\nUSER INPUT: {prompt}"
+
+                # Same process-wide model as the risk engine; re-probe once if it has disappeared
+                registry = get_model_registry()
+                res = None
+                for _ in range(2):
                     try:
-                        name = mname if mname.startswith('models/') else f"models/{mname}"
-                        m = genai.GenerativeModel(name)
-                        ctx = st.session_state.get('raw_text', '')[:12000]
-                        
-                        # Enhanced Solution-Oriented Prompt with Language Support
-                        detected_lang = st.session_state.get('language', 'en')
-                        lang_instr = "IMPORTANT: Provide all answers and solutions in HINDI." if detected_lang == "hi" else "Provide all answers in English."
-                        
-                        system_instr = f"""
-                        You are a Senior Legal Strategist. Your goal is to provide actionable solutions.
-                        {lang_instr}
-                        1. Answer questions based on the CONTRACT CONTEXT provided.
-                        2. If the user asks for suggestions or 'what to do', provide strategic advice and negotiation tips.
-                        3. Be proactive: if you see a high risk, suggest a safer alternative.
-                        4. Provide clear, professional, and step-by-step solutions.
-                        """
-                        full_prompt = f"{system_instr}\n\nCONTRACT CONTEXT:\n{ctx}\n\nUSER INPUT: {prompt}"
-                        
-                        res = m.generate_content(full_prompt)
-                        if res and res.text:
-                            st.session_state.chat_history.append({"role": "assistant", "content": res.text})
-                            st.session_state.working_model = mname # Cache it
-                            model_found = True
-                            break
-                    except:
-                        continue
-                
-                if not model_found:
+                        res = get_llm_client().generate(registry.get(api_key), full_prompt)
+                        break
+                    except Exception as e:
+                        if not is_model_not_found(e):
+                            raise
+                        registry.invalidate(api_key)
+
+                if res and res.text:
+                    st.session_state.chat_history.append({"role": "assistant", "content": res.text})
+                else:
                     st.session_state.chat_history.append({"role": "assistant", "content": "⚠️ All AI models failed. Please verify your API key access in Google AI Studio."})
                 st.rerun()
             except Exception as e: